@@ -0,0 +1,116 @@
+"""
+Prefix trie over catalog names (Pokemon, species, moves, items, abilities)
+with typo-tolerant lookup.
+
+Every node keeps the best-ranked entries of each kind in its subtree (shortest
+name first), so a prefix match is answered by walking len(query) nodes. Fuzzy
+matches walk the trie carrying a Levenshtein row and prune branches whose row
+minimum exceeds the allowed distance. Like most search boxes, fuzzy matching
+trusts the first letter, which keeps the walk to a single top-level branch.
+"""
+from typing import NamedTuple
+
+MAX_RESULTS = 25
+
+class NameEntry(NamedTuple):
+    kind: str
+    id: int
+    name: str
+
+def _rank(entry: NameEntry):
+    return (len(entry.name), entry.name, entry.kind, entry.id)
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        # kind -> best-ranked entries of that kind in this subtree
+        self.top = {}
+
+def normalize(query: str) -> str:
+    return "-".join(query.strip().lower().split())
+
+def default_max_distance(query: str) -> int:
+    if len(query) < 3:
+        return 0
+    if len(query) < 6:
+        return 1
+    return 2
+
+class NameTrie:
+    def __init__(self, entries):
+        self.root = _Node()
+        for entry in sorted(entries, key=_rank):
+            node = self.root
+            for char in entry.name:
+                self._keep(node, entry)
+                node = node.children.setdefault(char, _Node())
+            self._keep(node, entry)
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.top = {kind: tuple(entries) for kind, entries in node.top.items()}
+            stack.extend(node.children.values())
+
+    @staticmethod
+    def _keep(node, entry):
+        kept = node.top.setdefault(entry.kind, [])
+        if len(kept) < MAX_RESULTS:
+            kept.append(entry)
+
+    def complete(self, query: str, limit: int = 10, max_distance=None, kinds=None):
+        """
+        Return [(entry, distance)] for names whose prefix is within max_distance
+        edits of query, best first: fewer edits, then shorter names.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(query)
+        best = {}
+
+        def consider(node, distance):
+            for kind, entries in node.top.items():
+                if kinds and kind not in kinds:
+                    continue
+                for entry in entries:
+                    if distance < best.get(entry, max_distance + 1):
+                        best[entry] = distance
+
+        if max_distance == 0:
+            node = self.root
+            for char in query:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            else:
+                consider(node, 0)
+        else:
+            first_row = list(range(len(query) + 1))
+            first = self.root.children.get(query[0])
+            stack = [(first, query[0], first_row)] if first else []
+            while stack:
+                node, char, previous = stack.pop()
+                row = [previous[0] + 1]
+                for i, query_char in enumerate(query, start=1):
+                    row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (query_char != char)))
+                if row[-1] <= max_distance:
+                    consider(node, row[-1])
+                # Row minima never decrease with depth, so stop once no descendant can do better
+                if min(row) < min(row[-1], max_distance + 1):
+                    stack.extend((child, next_char, row) for next_char, child in node.children.items())
+
+        ranked = sorted(best.items(), key=lambda item: (item[1],) + _rank(item[0]))
+        return ranked[:limit]
+
+def build_name_index(catalog) -> NameTrie:
+    entries = []
+    entries.extend(NameEntry("pokemon", p.id, p.name) for p in catalog.pokemon.values())
+    entries.extend(NameEntry("species", s.id, s.name) for s in catalog.species.values())
+    entries.extend(NameEntry("move", m.id, m.name) for m in catalog.moves.values())
+    entries.extend(NameEntry("item", i.id, i.name) for i in catalog.items.values())
+    entries.extend(NameEntry("ability", a.id, a.name) for a in catalog.abilities.values())
+    return NameTrie(e for e in entries if e.name)
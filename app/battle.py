@@ -0,0 +1,256 @@
+"""
+Vectorized battle simulation (single battles, one active Pokemon per side).
+
+Each side fields its team in order and switches to the next member when the
+active one faints. Every attacker greedily uses whichever of its last four
+level-up damaging moves has the highest expected damage against the current
+defender, so the whole move choice reduces to per-pair (attacker, defender)
+tables computed once. N battles then run side by side as NumPy arrays, one
+vector step per turn. Large runs are split across a process pool.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from . import game_logic
+
+MAX_TURNS = 300
+CRIT_CHANCE = 1 / 24
+CRIT_MULTIPLIER = 1.5
+STAB = 1.5
+MOVES_PER_POKEMON = 4
+
+# Battles per run at which the process pool takes over (0 workers disables it)
+PROCESS_POOL_MIN_BATTLES = int(os.getenv("BATTLE_PROCESS_POOL_MIN_BATTLES", "20000"))
+PROCESS_POOL_WORKERS = int(os.getenv("BATTLE_PROCESS_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Used by Pokemon with no damaging move learned yet
+STRUGGLE = (50, 100, 0, "physical", None)
+
+@dataclass(frozen=True)
+class Combatant:
+    pokemon_id: int
+    name: str
+    level: int
+    # max_hp, attack, defense, special_attack, special_defense, speed
+    stats: Tuple[int, ...]
+    types: Tuple[str, ...]
+    # (power, accuracy, priority, damage_class, type name)
+    moves: Tuple[tuple, ...]
+
+def _moves(catalog, pokemon_id: int, level: int):
+    moves = []
+    for _, move_id in catalog.learnsets.get(pokemon_id).level_up(None, level):
+        move = catalog.moves.get(move_id)
+        if move and move.power and move.damage_class in ("physical", "special"):
+            move_type = catalog.types.get(move.type_id)
+            entry = (move.power, move.accuracy or 100, move.priority or 0, move.damage_class, move_type.name if move_type else None)
+            if entry not in moves:
+                moves.append(entry)
+    # The most recently learned moves, like a Pokemon that never forgot one on purpose
+    return tuple(moves[-MOVES_PER_POKEMON:]) or (STRUGGLE,)
+
+def combatant(catalog, pokemon_id: int, level: int, stats=None, name: Optional[str] = None) -> Optional[Combatant]:
+    """
+    Build a Combatant from the catalog. stats defaults to the level's computed stats.
+    """
+    pokemon = catalog.pokemon.get(pokemon_id)
+    if pokemon is None:
+        return None
+    if stats is None:
+        row = game_logic.calculate_stats_batch(game_logic.base_stats_matrix([pokemon.stats]), [level])[0]
+        stats = tuple(int(value) for value in row)
+    return Combatant(
+        pokemon_id=pokemon.id,
+        name=name or pokemon.name,
+        level=level,
+        stats=tuple(stats),
+        types=tuple(t.name for t in pokemon.types),
+        moves=_moves(catalog, pokemon.id, level),
+    )
+
+def party_combatants(catalog, user_pokemons):
+    team = []
+    for up in user_pokemons:
+        stats = (up.max_hp, up.attack, up.defense, up.special_attack, up.special_defense, up.speed)
+        member = combatant(catalog, up.pokemon_id, up.level, stats=stats, name=up.nickname)
+        if member:
+            team.append(member)
+    return team
+
+def trainer_team(catalog, type_name: Optional[str], level: int, size: int):
+    """
+    Heuristic team for a trainer without a stored roster: default Pokemon of the
+    trainer's specialty type, picked from the strongest share of the type that
+    the trainer's level allows.
+    """
+    type_name = type_name.lower() if type_name else None
+    candidates = [
+        p for p in catalog.pokemon.values()
+        if p.is_default is not False and p.stats and (type_name is None or any(t.name == type_name for t in p.types))
+    ]
+    if not candidates:
+        candidates = [p for p in catalog.pokemon.values() if p.stats]
+    candidates.sort(key=lambda p: (sum(p.stats.values()), p.id))
+    upper = max(size, round(len(candidates) * min(1.0, 0.35 + level / 100)))
+    return [combatant(catalog, p.id, level) for p in candidates[:upper][-size:]]
+
+def gym_opponent(catalog, gym_id: int):
+    """
+    (name, team) for a gym; leaders get stronger in gym id order.
+    """
+    gym = catalog.gyms.get(gym_id)
+    if gym is None:
+        return None
+    position = sorted(catalog.gyms).index(gym_id)
+    level = 12 + 6 * position
+    return gym.leader_name or gym.name, trainer_team(catalog, gym.type_specialty, level, min(2 + position, 6))
+
+def elite_four_opponent(catalog, member_id: int):
+    member = catalog.elite_four.get(member_id)
+    if member is None:
+        return None
+    level = 56 + 2 * max((member.rank or 1) - 1, 0)
+    return member.name, trainer_team(catalog, member.specialty_type, level, 5)
+
+def _pair_tables(attackers, defenders, chart):
+    """
+    (damage, accuracy, priority) arrays of shape (attackers, defenders) for
+    the move each attacker picks against each defender. damage is before the
+    random roll, critical hits and accuracy.
+    """
+    shape = (len(attackers), len(defenders))
+    damage = np.zeros(shape)
+    accuracy = np.ones(shape)
+    priority = np.zeros(shape, dtype=np.int64)
+    for i, attacker in enumerate(attackers):
+        level_factor = 2 * attacker.level / 5 + 2
+        for j, defender in enumerate(defenders):
+            defending = chart.type_indexes(defender.types)
+            best = None
+            for power, move_accuracy, move_priority, damage_class, move_type in attacker.moves:
+                if damage_class == "special":
+                    ratio = attacker.stats[3] / max(defender.stats[4], 1)
+                else:
+                    ratio = attacker.stats[1] / max(defender.stats[2], 1)
+                base = level_factor * power * ratio / 50 + 2
+                if move_type in chart.index:
+                    base *= float(chart.matrix[chart.index[move_type], defending].prod())
+                if move_type in attacker.types:
+                    base *= STAB
+                expected = base * move_accuracy / 100
+                if best is None or expected > best[0]:
+                    best = (expected, base, move_accuracy / 100, move_priority)
+            _, damage[i, j], accuracy[i, j], priority[i, j] = best
+    return damage, accuracy, priority
+
+def _roll(damage, accuracy, rng):
+    hits = rng.random(damage.shape) < accuracy
+    crits = np.where(rng.random(damage.shape) < CRIT_CHANCE, CRIT_MULTIPLIER, 1.0)
+    rolled = np.floor(damage * rng.uniform(0.85, 1.0, damage.shape) * crits)
+    # Any non-immune hit deals at least 1 HP
+    return np.where(hits & (damage > 0), np.maximum(rolled, 1), 0)
+
+def _run_battles(tables, battles: int, seed, max_turns: int = MAX_TURNS):
+    """
+    Run battles in lockstep. Returns (wins, turns of finished battles, unfinished).
+    """
+    hp_a, speed_a, damage_ab, accuracy_ab, priority_ab, hp_b, speed_b, damage_ba, accuracy_ba, priority_ba = tables
+    rng = np.random.default_rng(seed)
+    size_a, size_b = len(hp_a), len(hp_b)
+
+    health_a = np.tile(hp_a.astype(float), (battles, 1))
+    health_b = np.tile(hp_b.astype(float), (battles, 1))
+    active_a = np.zeros(battles, dtype=np.intp)
+    active_b = np.zeros(battles, dtype=np.intp)
+    turns = np.zeros(battles, dtype=np.int64)
+    won = np.zeros(battles, dtype=bool)
+    live = np.arange(battles)
+
+    for turn in range(1, max_turns + 1):
+        if not live.size:
+            break
+        a, b = active_a[live], active_b[live]
+
+        # Higher move priority goes first, then higher speed, then a coin flip
+        prio_a, prio_b = priority_ab[a, b], priority_ba[b, a]
+        spe_a, spe_b = speed_a[a], speed_b[b]
+        coin = rng.random(live.size) < 0.5
+        a_first = (prio_a > prio_b) | ((prio_a == prio_b) & ((spe_a > spe_b) | ((spe_a == spe_b) & coin)))
+
+        hit_b = _roll(damage_ab[a, b], accuracy_ab[a, b], rng)
+        hit_a = _roll(damage_ba[b, a], accuracy_ba[b, a], rng)
+        hb = health_b[live, b] - np.where(a_first, hit_b, 0)
+        ha = health_a[live, a] - np.where(a_first, 0, hit_a)
+        # The slower Pokemon only strikes back if it survived
+        hb = np.where(~a_first & (ha > 0), hb - hit_b, hb)
+        ha = np.where(a_first & (hb > 0), ha - hit_a, ha)
+        health_a[live, a], health_b[live, b] = ha, hb
+
+        turns[live] = turn
+        active_a[live] += ha <= 0
+        active_b[live] += hb <= 0
+        lost_a = active_a[live] >= size_a
+        lost_b = active_b[live] >= size_b
+        won[live] = lost_b
+        live = live[~(lost_a | lost_b)]
+
+    finished = np.ones(battles, dtype=bool)
+    finished[live] = False
+    won[live] = False
+    return int(won.sum()), int(turns[finished].sum()), int(live.size)
+
+_executor = None
+# simulate() runs on the request threadpool, so concurrent calls must not each create a pool
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+        return _executor
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+def simulate(party, opponents, chart, battles: int, seed=None):
+    """
+    Simulate battles of party (side A) against opponents (side B).
+    Returns a dict with wins, unfinished, win_probability and expected_turns.
+    """
+    damage_ab, accuracy_ab, priority_ab = _pair_tables(party, opponents, chart)
+    damage_ba, accuracy_ba, priority_ba = _pair_tables(opponents, party, chart)
+    tables = (
+        np.array([c.stats[0] for c in party]), np.array([c.stats[5] for c in party]), damage_ab, accuracy_ab, priority_ab,
+        np.array([c.stats[0] for c in opponents]), np.array([c.stats[5] for c in opponents]), damage_ba, accuracy_ba, priority_ba,
+    )
+
+    if PROCESS_POOL_WORKERS > 1 and battles >= PROCESS_POOL_MIN_BATTLES:
+        chunks = np.array_split(np.arange(battles), PROCESS_POOL_WORKERS)
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        executor = _get_executor()
+        futures = [executor.submit(_run_battles, tables, len(chunk), s) for chunk, s in zip(chunks, seeds)]
+        results = [future.result() for future in futures]
+    else:
+        results = [_run_battles(tables, battles, seed)]
+
+    wins = sum(r[0] for r in results)
+    turns = sum(r[1] for r in results)
+    unfinished = sum(r[2] for r in results)
+    finished = battles - unfinished
+    return {
+        "battles": battles,
+        "wins": wins,
+        "unfinished": unfinished,
+        "win_probability": wins / battles if battles else 0.0,
+        "expected_turns": turns / finished if finished else float(MAX_TURNS),
+    }
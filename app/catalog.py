@@ -0,0 +1,456 @@
+"""
+In-memory snapshot of the seeded reference data (Pokemon, species, types,
+abilities, moves, items, berries, gyms and the Elite Four).
+
+The reference tables only change when seed_db.py runs, so the whole catalog is
+loaded once into frozen objects and served without a database session. The
+seeders bump models.CatalogVersion; a background task polls that stamp and
+swaps in a freshly loaded snapshot when it changes.
+"""
+import asyncio
+import os
+import re
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .search import PokedexIndex
+from .autocomplete import build_name_index
+from .encounters import EncounterPools
+from .learnset import LearnsetIndex
+from .evolution import EvolutionEdgeEntry, EvolutionGraph, has_extra_conditions
+from .type_chart import TypeChart
+
+CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "30"))
+
+# --- Frozen records ---
+@dataclass(frozen=True, slots=True)
+class TypeEntry:
+    id: int
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class AbilityEntry:
+    id: int
+    name: str
+    effect: Optional[str]
+
+@dataclass(frozen=True, slots=True)
+class GrowthRateEntry:
+    id: int
+    name: str
+    formula: Optional[str]
+
+@dataclass(frozen=True, slots=True)
+class SpeciesEntry:
+    id: int
+    name: str
+    order: Optional[int]
+    gender_rate: Optional[int]
+    capture_rate: Optional[int]
+    base_happiness: Optional[int]
+    is_baby: Optional[bool]
+    is_legendary: Optional[bool]
+    is_mythical: Optional[bool]
+    growth_rate: Optional[GrowthRateEntry]
+    generation_id: Optional[int]
+    generation_name: Optional[str]
+    egg_group_ids: Tuple[int, ...]
+    evolves_from_species_id: Optional[int]
+    evolution_level: Optional[int]
+    evolution_species_id: Optional[int]
+
+@dataclass(frozen=True, slots=True)
+class PokemonEntry:
+    id: int
+    name: str
+    species_id: Optional[int]
+    height: Optional[int]
+    weight: Optional[int]
+    base_experience: Optional[int]
+    order: Optional[int]
+    is_default: Optional[bool]
+    types: Tuple[TypeEntry, ...]
+    abilities: Tuple[AbilityEntry, ...]
+    stats: Optional[dict]
+    sprites: Optional[dict]
+    species: Optional[SpeciesEntry]
+
+    @property
+    def front_sprite(self) -> Optional[str]:
+        return (self.sprites or {}).get("front_default")
+
+@dataclass(frozen=True, slots=True)
+class MoveEntry:
+    id: int
+    name: str
+    type_id: Optional[int]
+    power: Optional[int]
+    pp: Optional[int]
+    accuracy: Optional[int]
+    priority: Optional[int]
+    damage_class: Optional[str]
+    effect_chance: Optional[int]
+    generation_id: Optional[int]
+
+@dataclass(frozen=True, slots=True)
+class ItemEntry:
+    id: int
+    name: str
+    cost: Optional[int]
+    fling_power: Optional[int]
+    category_name: Optional[str]
+    effect: Optional[str]
+    sprite_url: Optional[str]
+
+@dataclass(frozen=True, slots=True)
+class BerryEntry:
+    id: int
+    item_id: Optional[int]
+    name: str
+    growth_time: Optional[int]
+    max_harvest: Optional[int]
+    natural_gift_power: Optional[int]
+    size: Optional[int]
+    smoothness: Optional[int]
+    soil_dryness: Optional[int]
+    firmness_name: Optional[str]
+    item: Optional[ItemEntry]
+
+@dataclass(frozen=True, slots=True)
+class GymEntry:
+    id: int
+    name: str
+    location: Optional[str]
+    leader_name: Optional[str]
+    type_specialty: Optional[str]
+    badge_name: Optional[str]
+    badge_image_url: Optional[str]
+
+@dataclass(frozen=True, slots=True)
+class EliteFourEntry:
+    id: int
+    name: str
+    rank: Optional[int]
+    specialty_type: Optional[str]
+    image_url: Optional[str]
+
+# --- Snapshot ---
+POKEMON_SORT_KEYS = ("order", "id", "name", "base_experience")
+
+def _sort_value(pokemon: PokemonEntry, sort: str):
+    value = getattr(pokemon, sort)
+    if value is None:
+        return "" if sort == "name" else 0
+    return value
+
+class Catalog:
+    """
+    Immutable view of the reference data, indexed by id and name.
+    Never mutate a Catalog after construction; reloads build a new one.
+    """
+    def __init__(self, stamp, types, abilities, egg_groups, species, evolutions, pokemon, moves, learnsets, items, berries, gyms, elite_four):
+        self.stamp = stamp
+        self.types = types
+        self.egg_groups = egg_groups
+        self.abilities = abilities
+        self.species = species
+        self.evolutions = evolutions
+        self.pokemon = pokemon
+        self.moves = moves
+        self.learnsets = learnsets
+        self.items = items
+        self.berries = berries
+        self.gyms = gyms
+        self.elite_four = elite_four
+
+        self.types_by_name = {t.name: t for t in types.values()}
+        self.species_by_name = {s.name: s for s in species.values()}
+        self.pokemon_by_name = {p.name: p for p in pokemon.values()}
+        self.moves_by_name = {m.name: m for m in moves.values()}
+        self.items_by_name = {i.name: i for i in items.values()}
+        # Signup and catch lookups, resolved once per snapshot
+        self.poke_ball_id = _poke_ball_id(items, self.items_by_name)
+        potion = self.items_by_name.get("potion")
+        self.potion_id = potion.id if potion else None
+        # Starters are drawn from every Pokemon
+        self.starter_ids = np.array(sorted(pokemon), dtype=np.int64)
+
+        # species id -> its default Pokemon (the form a species evolves into)
+        self.default_pokemon = {}
+        for p in sorted(pokemon.values(), key=lambda p: (not p.is_default, p.id)):
+            if p.species_id is not None:
+                self.default_pokemon.setdefault(p.species_id, p)
+
+        self.item_list = tuple(items[i] for i in sorted(items))
+        self.berry_list = tuple(berries[i] for i in sorted(berries))
+        self.gym_list = tuple(gyms[i] for i in sorted(gyms))
+        self.elite_four_list = tuple(sorted(elite_four.values(), key=lambda m: (m.rank or 0, m.id)))
+
+        # Pre-sorted (key, id) arrays for offset and keyset pagination
+        self._pokemon_keys = {}
+        self._pokemon_sorted = {}
+        for sort in POKEMON_SORT_KEYS:
+            ordered = sorted(pokemon.values(), key=lambda p: (_sort_value(p, sort), p.id))
+            self._pokemon_keys[sort] = [(_sort_value(p, sort), p.id) for p in ordered]
+            self._pokemon_sorted[sort] = tuple(ordered)
+
+        self.growth_rates_by_pokemon = {
+            p.id: p.species.growth_rate.name for p in pokemon.values() if p.species and p.species.growth_rate
+        }
+
+        self.type_chart = TypeChart(types)
+        self.search_index = PokedexIndex(pokemon, egg_groups)
+        self.name_index = build_name_index(self)
+        self.encounters = EncounterPools(pokemon)
+
+    def growth_rate_name(self, pokemon_id: int, default: str = "medium-fast") -> str:
+        return self.growth_rates_by_pokemon.get(pokemon_id, default)
+
+    def pokemon_batch(self, ids):
+        """
+        Look up many Pokemon at once. Returns (found, missing), both in request order.
+        """
+        found, missing = [], []
+        for pokemon_id in dict.fromkeys(ids):
+            pokemon = self.pokemon.get(pokemon_id)
+            if pokemon is None:
+                missing.append(pokemon_id)
+            else:
+                found.append(pokemon)
+        return found, missing
+
+    def pokemon_slice(self, sort: str = "order", descending: bool = False, skip: int = 0, limit: int = 100):
+        ordered = self._pokemon_sorted[sort]
+        if descending:
+            ordered = ordered[::-1]
+        return list(ordered[skip:skip + limit])
+
+    def pokemon_page(self, sort: str = "order", descending: bool = False, after=None, limit: int = 100):
+        """
+        Keyset page of Pokemon strictly after the (value, id) position `after`.
+        Returns (pokemons, last_position); last_position is None on the final page.
+        """
+        keys = self._pokemon_keys[sort]
+        ordered = self._pokemon_sorted[sort]
+        try:
+            if descending:
+                end = bisect_left(keys, tuple(after)) if after else len(keys)
+                start = max(0, end - limit)
+                page = ordered[start:end][::-1]
+                has_more = start > 0
+            else:
+                start = bisect_right(keys, tuple(after)) if after else 0
+                page = ordered[start:start + limit]
+                has_more = start + limit < len(keys)
+        except TypeError:
+            raise ValueError("Cursor does not match the requested ordering")
+        last_position = None
+        if has_more and page:
+            last_position = (_sort_value(page[-1], sort), page[-1].id)
+        return list(page), last_position
+
+def _poke_ball_id(items: dict, items_by_name: dict) -> Optional[int]:
+    if "poke-ball" in items_by_name:
+        return items_by_name["poke-ball"].id
+    # Same match as the old ILIKE '%poke%ball%' lookup
+    matches = [i.id for i in items.values() if re.search("poke.*ball", i.name.lower())]
+    if matches:
+        return min(matches)
+    return 1 if 1 in items else None
+
+# --- Loading ---
+def _load(db: Session, stamp) -> Catalog:
+    types = {r.id: TypeEntry(r.id, r.name) for r in db.execute(select(models.Type.id, models.Type.name))}
+    abilities = {
+        r.id: AbilityEntry(r.id, r.name, r.effect)
+        for r in db.execute(select(models.Ability.id, models.Ability.name, models.Ability.effect))
+    }
+    growth_rates = {
+        r.id: GrowthRateEntry(r.id, r.name, r.formula)
+        for r in db.execute(select(models.GrowthRate.id, models.GrowthRate.name, models.GrowthRate.formula))
+    }
+    generations = dict(db.execute(select(models.Generation.id, models.Generation.name)).all())
+    egg_group_names = dict(db.execute(select(models.EggGroup.id, models.EggGroup.name)).all())
+
+    egg_groups = defaultdict(list)
+    for species_id, egg_group_id in db.execute(select(models.pokemon_egg_groups.c.species_id, models.pokemon_egg_groups.c.egg_group_id)):
+        egg_groups[species_id].append(egg_group_id)
+
+    S = models.PokemonSpecies
+    species = {}
+    for r in db.execute(select(
+        S.id, S.name, S.order, S.gender_rate, S.capture_rate, S.base_happiness, S.is_baby, S.is_legendary, S.is_mythical,
+        S.growth_rate_id, S.generation_id, S.evolves_from_species_id, S.evolution_level, S.evolution_species_id,
+    )):
+        species[r.id] = SpeciesEntry(
+            id=r.id, name=r.name, order=r.order, gender_rate=r.gender_rate, capture_rate=r.capture_rate,
+            base_happiness=r.base_happiness, is_baby=r.is_baby, is_legendary=r.is_legendary, is_mythical=r.is_mythical,
+            growth_rate=growth_rates.get(r.growth_rate_id),
+            generation_id=r.generation_id, generation_name=generations.get(r.generation_id),
+            egg_group_ids=tuple(egg_groups.get(r.id, ())),
+            evolves_from_species_id=r.evolves_from_species_id,
+            evolution_level=r.evolution_level, evolution_species_id=r.evolution_species_id,
+        )
+
+    EE = models.EvolutionEdge
+    evolutions = EvolutionGraph(species, (
+        EvolutionEdgeEntry(
+            r.from_species_id, r.to_species_id, r.trigger, r.min_level, r.item_name,
+            conditional=has_extra_conditions(r.details),
+        )
+        for r in db.execute(select(EE.from_species_id, EE.to_species_id, EE.trigger, EE.min_level, EE.item_name, EE.details).order_by(EE.id))
+    ))
+
+    pokemon_types = defaultdict(list)
+    for pokemon_id, type_id in db.execute(select(models.pokemon_types.c.pokemon_id, models.pokemon_types.c.type_id)):
+        if type_id in types:
+            pokemon_types[pokemon_id].append(types[type_id])
+    pokemon_abilities = defaultdict(list)
+    for pokemon_id, ability_id in db.execute(select(models.pokemon_abilities.c.pokemon_id, models.pokemon_abilities.c.ability_id)):
+        if ability_id in abilities:
+            pokemon_abilities[pokemon_id].append(abilities[ability_id])
+
+    P = models.Pokemon
+    pokemon = {}
+    for r in db.execute(select(
+        P.id, P.name, P.species_id, P.height, P.weight, P.base_experience, P.order, P.is_default, P.stats, P.sprites,
+    )):
+        pokemon[r.id] = PokemonEntry(
+            id=r.id, name=r.name, species_id=r.species_id, height=r.height, weight=r.weight,
+            base_experience=r.base_experience, order=r.order, is_default=r.is_default,
+            types=tuple(pokemon_types.get(r.id, ())), abilities=tuple(pokemon_abilities.get(r.id, ())),
+            stats=r.stats, sprites=r.sprites, species=species.get(r.species_id),
+        )
+
+    M = models.Move
+    moves = {
+        r.id: MoveEntry(r.id, r.name, r.type_id, r.power, r.pp, r.accuracy, r.priority, r.damage_class, r.effect_chance, r.generation_id)
+        for r in db.execute(select(
+            M.id, M.name, M.type_id, M.power, M.pp, M.accuracy, M.priority, M.damage_class, M.effect_chance, M.generation_id,
+        ))
+    }
+
+    PM = models.PokemonMove
+    learnsets = LearnsetIndex(
+        tuple(r) for r in db.execute(select(PM.pokemon_id, PM.move_id, PM.learn_method, PM.level_learned_at))
+        if r.move_id in moves
+    )
+
+    I = models.Item
+    items = {
+        r.id: ItemEntry(r.id, r.name, r.cost, r.fling_power, r.category_name, r.effect, r.sprite_url)
+        for r in db.execute(select(I.id, I.name, I.cost, I.fling_power, I.category_name, I.effect, I.sprite_url))
+    }
+
+    B = models.Berry
+    berries = {
+        r.id: BerryEntry(
+            r.id, r.item_id, r.name, r.growth_time, r.max_harvest, r.natural_gift_power, r.size,
+            r.smoothness, r.soil_dryness, r.firmness_name, items.get(r.item_id),
+        )
+        for r in db.execute(select(
+            B.id, B.item_id, B.name, B.growth_time, B.max_harvest, B.natural_gift_power, B.size,
+            B.smoothness, B.soil_dryness, B.firmness_name,
+        ))
+    }
+
+    G = models.Gym
+    gyms = {
+        r.id: GymEntry(r.id, r.name, r.location, r.leader_name, r.type_specialty, r.badge_name, r.badge_image_url)
+        for r in db.execute(select(G.id, G.name, G.location, G.leader_name, G.type_specialty, G.badge_name, G.badge_image_url))
+    }
+
+    E = models.EliteFourMember
+    elite_four = {
+        r.id: EliteFourEntry(r.id, r.name, r.rank, r.specialty_type, r.image_url)
+        for r in db.execute(select(E.id, E.name, E.rank, E.specialty_type, E.image_url))
+    }
+
+    return Catalog(stamp, types, abilities, egg_group_names, species, evolutions, pokemon, moves, learnsets, items, berries, gyms, elite_four)
+
+def read_stamp(db: Session):
+    return db.execute(select(models.CatalogVersion.stamp).where(models.CatalogVersion.id == 1)).scalar()
+
+def bump_version(db: Session):
+    """
+    Mark the reference data as changed. Called by the seeders after they commit.
+    """
+    row = db.get(models.CatalogVersion, 1)
+    if row is None:
+        row = models.CatalogVersion(id=1, stamp=uuid.uuid4().hex)
+        db.add(row)
+    else:
+        row.stamp = uuid.uuid4().hex
+    db.commit()
+    return row.stamp
+
+# --- Process-wide snapshot ---
+_current: Optional[Catalog] = None
+_reload_lock = threading.RLock()
+
+def load_catalog() -> Catalog:
+    """
+    Load a fresh snapshot and atomically publish it.
+    """
+    global _current
+    with _reload_lock:
+        db = SessionLocal()
+        try:
+            catalog = _load(db, read_stamp(db))
+        finally:
+            db.close()
+        _current = catalog
+    return catalog
+
+def refresh_catalog() -> bool:
+    """
+    Reload the snapshot if the seeders bumped the stamp. Returns True if it reloaded.
+    """
+    db = SessionLocal()
+    try:
+        stamp = read_stamp(db)
+    finally:
+        db.close()
+    if _current is not None and stamp == _current.stamp:
+        return False
+    load_catalog()
+    return True
+
+async def watch_catalog_version(interval: int = CATALOG_REFRESH_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh_catalog)
+        except Exception as e:
+            print(f"Error refreshing catalog: {e}")
+
+def current_catalog() -> Catalog:
+    """
+    The current snapshot, loading it on first use.
+    """
+    catalog = _current
+    if catalog is None:
+        with _reload_lock:
+            catalog = _current or load_catalog()
+    return catalog
+
+async def get_catalog() -> Catalog:
+    """
+    Dependency returning the current snapshot. It is async so handlers do not
+    pay a threadpool hop for it; the lifespan loads the snapshot before traffic,
+    and a first-use load (no lifespan, e.g. in tests) still runs off the event loop.
+    """
+    catalog = _current
+    if catalog is None:
+        catalog = await asyncio.to_thread(current_catalog)
+    return catalog
@@ -1,336 +1,499 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from . import models, schemas, auth, game_logic
+from sqlalchemy.orm import Session, selectinload, joinedload, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, update, select, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from . import models, schemas, auth, game_logic, xp_table, principals
 import random
 
-# Pokemon
-def get_pokemon(db: Session, pokemon_id: int):
-    return db.query(models.Pokemon).filter(models.Pokemon.id == pokemon_id).first()
+# Request handlers use an AsyncSession (see dependencies.get_db), so the
+# functions they call are coroutines. Relationships that end up in a response
+# must be eager-loaded: lazy loading is not available under asyncio. The bulk
+# maintenance functions used by the scripts take a regular Session.
+
+# Loader strategies for everything serialized through schemas.PokemonBase.
+# Collections use selectinload (one extra IN query per page), scalar
+# relationships are joined into the main statement.
+POKEMON_LOAD_OPTIONS = (
+    selectinload(models.Pokemon.types),
+    selectinload(models.Pokemon.abilities),
+    joinedload(models.Pokemon.species).joinedload(models.PokemonSpecies.growth_rate),
+)
+
+# Pokemon columns that a projection (see app/projection.py) can select
+POKEMON_PROJECTABLE_COLUMNS = ("name", "height", "weight", "base_experience", "stats", "sprites", "front_sprite")
+
+def pokemon_load_options(fields=None):
+    """
+    Loader options for a Pokemon projection: only the requested columns are
+    selected and only the requested relationships are eager-loaded.
+    """
+    if fields is None:
+        return POKEMON_LOAD_OPTIONS
+    columns = [getattr(models.Pokemon, name) for name in POKEMON_PROJECTABLE_COLUMNS if name in fields]
+    options = [load_only(models.Pokemon.id, *columns)]
+    if "types" in fields:
+        options.append(selectinload(models.Pokemon.types))
+    if "abilities" in fields:
+        options.append(selectinload(models.Pokemon.abilities))
+    if "species" in fields:
+        options.append(joinedload(models.Pokemon.species).joinedload(models.PokemonSpecies.growth_rate))
+    return tuple(options)
+
+def pokemon_loader(relationship, fields=None):
+    """Eager-load a relationship pointing at Pokemon together with its nested data."""
+    return selectinload(relationship).options(*pokemon_load_options(fields))
 
-def get_pokemons(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Pokemon).offset(skip).limit(limit).all()
+# Pokemon
+async def get_pokemon(db: AsyncSession, pokemon_id: int):
+    return await db.scalar(select(models.Pokemon).options(*POKEMON_LOAD_OPTIONS).where(models.Pokemon.id == pokemon_id))
 
-def create_pokemon(db: Session, pokemon: schemas.PokemonCreate):
+async def create_pokemon(db: AsyncSession, pokemon: schemas.PokemonCreate):
     db_pokemon = models.Pokemon(**pokemon.dict())
     db.add(db_pokemon)
-    db.commit()
-    db.refresh(db_pokemon)
+    await db.commit()
+    await db.refresh(db_pokemon)
     return db_pokemon
 
 # User
-def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
-
-def get_user_by_username(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
-
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
-
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = auth.get_password_hash(user.password)
-    # Initial money: 1200
-    # db_user = models.User(email=user.email, username=user.username, hashed_password=hashed_password, money=1200)
-    # Manually get the max id and increment by 1
-    max_id = db.query(func.max(models.User.id)).scalar() or 0
-    new_id = max_id + 1
-
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.scalar(select(models.User).where(models.User.id == user_id))
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(models.User).where(models.User.username == username))
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+async def get_user_by_username_or_email(db: AsyncSession, username: str, email: str):
+    return await db.scalar(select(models.User).where(or_(models.User.username == username, models.User.email == email)))
+
+async def update_user_password_hash(db: AsyncSession, user_id: int, hashed_password: str):
+    await db.execute(update(models.User).where(models.User.id == user_id).values(hashed_password=hashed_password))
+    await db.commit()
+
+STARTING_MONEY = 2000
+STARTER_LEVEL = 5
+# (catalog attribute with the item id, quantity)
+STARTING_ITEMS = (("poke_ball_id", 3), ("potion_id", 5))
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, catalog, hashed_password: str = None):
+    """
+    Create a user with starting items and a random starter in one transaction.
+    Item ids and the starter pool come from the catalog, so the only
+    statements are the inserts. Returns None if the username or email was
+    taken concurrently. Pass hashed_password when it was already hashed.
+    """
+    if hashed_password is None:
+        hashed_password = await auth.get_password_hash_async(user.password)
+    # Ids come from the serial sequences (INSERT ... RETURNING id); run
+    # resync_sequences.py if a database was filled with explicit ids
     db_user = models.User(
-        id=new_id,
         email=user.email,
         username=user.username,
         hashed_password=hashed_password,
-        money=2000  # Updated initial money
+        money=STARTING_MONEY,
     )
+
+    for attribute, quantity in STARTING_ITEMS:
+        item_id = getattr(catalog, attribute)
+        if item_id is not None:
+            db_user.items.append(models.UserItem(item_id=item_id, quantity=quantity))
+
+    if len(catalog.starter_ids):
+        starter = catalog.pokemon[int(catalog.starter_ids[random.randrange(len(catalog.starter_ids))])]
+        db_user.pokemons.append(models.UserPokemon(
+            pokemon_id=starter.id,
+            level=STARTER_LEVEL,
+            next_level_xp=xp_table.next_level_xp(catalog.growth_rate_name(starter.id), STARTER_LEVEL),
+            is_in_party=True,
+            **game_logic.calculate_stats(starter.stats, STARTER_LEVEL)
+        ))
+
     db.add(db_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return None
+    await db.refresh(db_user)
+    return db_user
+
+# Game
+def pokemon_growth_rate(pokemon: models.Pokemon) -> str:
+    """
+    Growth rate name of a Pokemon, falling back to its species for rows that
+    predate the denormalized column.
+    """
+    if pokemon.growth_rate:
+        return pokemon.growth_rate
+    if pokemon.species and pokemon.species.growth_rate:
+        return pokemon.species.growth_rate.name
+    return xp_table.DEFAULT_GROWTH_RATE
+
+def sync_pokemon_growth_rates(db: Session):
+    """
+    Copy each species' growth rate name onto the Pokemon rows where it differs.
+    """
+    growth_rate = (
+        select(models.GrowthRate.name)
+        .join(models.PokemonSpecies, models.PokemonSpecies.growth_rate_id == models.GrowthRate.id)
+        .where(models.PokemonSpecies.id == models.Pokemon.species_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(models.Pokemon)
+        .where(models.Pokemon.growth_rate.is_distinct_from(growth_rate))
+        .values(growth_rate=growth_rate)
+    )
     db.commit()
-    db.refresh(db_user)
-    
-    # 1. Initial Items: 3 Poke Balls
-    poke_ball = db.query(models.Item).filter(models.Item.name.ilike("%poke%ball%")).first()
-    if not poke_ball:
-        poke_ball = db.query(models.Item).filter(models.Item.id == 1).first()
-        
-    if poke_ball:
-        max_ui_id = db.query(func.max(models.UserItem.id)).scalar() or 0
-        initial_pokeballs = models.UserItem(id=max_ui_id + 1, user_id=db_user.id, item_id=poke_ball.id, quantity=3)
-        db.add(initial_pokeballs)
-        db.commit() # Commit to ensure next ID is unique
-        
-    # 2. Initial Items: 5 Potions
-    potion = db.query(models.Item).filter(models.Item.name.ilike("potion")).first()
-    if potion:
-        max_ui_id = db.query(func.max(models.UserItem.id)).scalar() or 0
-        initial_potions = models.UserItem(id=max_ui_id + 1, user_id=db_user.id, item_id=potion.id, quantity=5)
-        db.add(initial_potions)
-        db.commit()
-        
-    # 3. Random Starter Pokemon (Any from the database)
-    poke_count = db.query(models.Pokemon).count()
-    if poke_count > 0:
-        random_index = random.randint(0, poke_count - 1)
-        starter_poke = db.query(models.Pokemon).offset(random_index).first()
-        starter_id = starter_poke.id
-    else:
-        starter_id = 1 # Fallback
-    
-    # Manual ID generation for UserPokemon
-    max_up_id = db.query(func.max(models.UserPokemon.id)).scalar() or 0
-    new_up_id = max_up_id + 1
-    
-    # Calculate stats
-    pokemon_data = db.query(models.Pokemon).get(starter_id)
-    stats = game_logic.calculate_stats(pokemon_data.stats, 5)
-    
-    starter_pokemon = models.UserPokemon(
-        id=new_up_id,
-        user_id=db_user.id,
-        pokemon_id=starter_id,
-        level=5,
-        is_in_party=True,
-        **stats
+
+def refresh_next_level_xp(db: Session):
+    """
+    Fill in user_pokemon.next_level_xp from the XP table for owned Pokemon that
+    have none yet. Rows add_xp has already written are left alone, so this is
+    safe to run while the app is serving requests.
+    """
+    rows = db.query(models.UserPokemon.id, models.UserPokemon.level, models.Pokemon.growth_rate).join(
+        models.Pokemon, models.UserPokemon.pokemon_id == models.Pokemon.id
+    ).filter(
+        or_(models.UserPokemon.next_level_xp.is_(None), models.UserPokemon.next_level_xp == 0)
+    ).all()
+    if not rows:
+        return 0
+
+    next_xp = xp_table.next_level_xp_batch([row.growth_rate for row in rows], [row.level for row in rows])
+    db.execute(
+        update(models.UserPokemon),
+        [{"id": row.id, "next_level_xp": xp} for row, xp in zip(rows, next_xp.tolist())],
     )
-    db.add(starter_pokemon)
-    
     db.commit()
-    
-    return db_user
+    return len(rows)
 
-# Game
-def add_user_pokemon(db: Session, user_id: int, pokemon_id: int, nickname: str = None):
-    # Manual ID generation to handle broken auto-increment on remote DB
-    max_id = db.query(func.max(models.UserPokemon.id)).scalar() or 0
-    new_id = max_id + 1
-    
-    # Calculate stats
-    pokemon = get_pokemon(db, pokemon_id)
+async def add_user_pokemon(db: AsyncSession, user_id: int, pokemon_id: int, catalog, nickname: str = None):
+    # Calculate stats from the catalog entry the caller already checked
+    pokemon = catalog.pokemon[pokemon_id]
     stats = game_logic.calculate_stats(pokemon.stats, 1) # Start at level 1
     
     db_user_pokemon = models.UserPokemon(
-        id=new_id, 
         user_id=user_id, 
         pokemon_id=pokemon_id, 
         nickname=nickname,
+        next_level_xp=xp_table.next_level_xp(catalog.growth_rate_name(pokemon_id), 1),
         **stats
     )
     db.add(db_user_pokemon)
-    db.commit()
-    db.refresh(db_user_pokemon)
-    return db_user_pokemon
-
-def get_user_pokemons(db: Session, user_id: int):
-    return db.query(models.UserPokemon).filter(models.UserPokemon.user_id == user_id).all()
-
-def get_user_pokemon(db: Session, user_pokemon_id: int):
-    return db.query(models.UserPokemon).filter(models.UserPokemon.id == user_pokemon_id).first()
+    await db.commit()
+    return await get_user_pokemon(db, db_user_pokemon.id)
+
+async def get_user_pokemons(db: AsyncSession, user_id: int, fields=None):
+    result = await db.scalars(select(models.UserPokemon).options(pokemon_loader(models.UserPokemon.pokemon, fields)).where(models.UserPokemon.user_id == user_id))
+    return result.all()
+
+async def get_user_pokemon(db: AsyncSession, user_pokemon_id: int):
+    """
+    The row re-read from the database with its Pokemon loaded.
+    """
+    return await db.scalar(
+        select(models.UserPokemon)
+        .options(pokemon_loader(models.UserPokemon.pokemon))
+        .where(models.UserPokemon.id == user_pokemon_id)
+        .execution_options(populate_existing=True)
+    )
 
-def add_battle_history(db: Session, user_id: int, battle: schemas.BattleHistoryCreate):
+async def add_battle_history(db: AsyncSession, user_id: int, battle: schemas.BattleHistoryCreate):
     db_battle = models.BattleHistory(**battle.dict(), user_id=user_id)
     db.add(db_battle)
-    
-    # Update user money
-    user = get_user(db, user_id)
-    user.money += battle.money_earned
-    
-    db.commit()
-    db.refresh(db_battle)
+    await add_money(db, user_id, battle.money_earned, commit=False)
+    await db.commit()
+    principals.cache.invalidate(user_id)
+    await db.refresh(db_battle)
     return db_battle
 
-def get_user_party(db: Session, user_id: int):
-    return db.query(models.UserPokemon).filter(models.UserPokemon.user_id == user_id, models.UserPokemon.is_in_party == True).all()
+async def get_user_party(db: AsyncSession, user_id: int, fields=None):
+    result = await db.scalars(select(models.UserPokemon).options(pokemon_loader(models.UserPokemon.pokemon, fields)).where(models.UserPokemon.user_id == user_id, models.UserPokemon.is_in_party == True))
+    return result.all()
 
-def update_party_status(db: Session, user_pokemon: models.UserPokemon, is_in_party: bool):
-    user_pokemon.is_in_party = is_in_party
-    db.commit()
-    db.refresh(user_pokemon)
-    return user_pokemon
+async def count_user_party(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(models.UserPokemon)
+        .where(models.UserPokemon.user_id == user_id, models.UserPokemon.is_in_party == True)
+    )
 
-def add_xp(db: Session, user_pokemon_id: int, xp_amount: int):
-    user_pokemon = get_user_pokemon(db, user_pokemon_id)
-    if not user_pokemon:
-        return None
-    
-    # Simple XP logic: level up every 100 XP * current_level (or simplified)
-    # Using the logic from game_logic.py would be better but let's just update XP field
-    # and let frontend or a separate logic handle leveling?
-    # No, backend should handle leveling.
-    
-    # For now, just add to experience field.
-    # We need to import calculate_xp_for_level or implement leveling logic here.
-    # Let's assume linear leveling for simplicity or just store total XP.
-    
+async def update_party_status(db: AsyncSession, user_pokemon: models.UserPokemon, is_in_party: bool):
+    user_pokemon.is_in_party = is_in_party
+    await db.commit()
+    return await get_user_pokemon(db, user_pokemon.id)
+
+async def add_xp(db: AsyncSession, user_pokemon: models.UserPokemon, xp_amount: int, catalog) -> schemas.UserPokemonLevelUp:
+    """
+    Add XP to a row loaded by get_user_pokemon and resolve the whole level jump
+    at once: the new level comes from the XP table, level-up evolutions crossed
+    on the way are applied, and stats are computed once for the final level and
+    form. Returns the updated Pokemon with levels_gained, evolutions and new_moves.
+    """
+    pokemon = user_pokemon.pokemon
     user_pokemon.experience += xp_amount
-    
-    # Check for level up
-    growth_rate = "medium-fast"
-    if user_pokemon.pokemon and user_pokemon.pokemon.species and user_pokemon.pokemon.species.growth_rate:
-        growth_rate = user_pokemon.pokemon.species.growth_rate.name
-        
-    while True:
-        xp_needed = game_logic.calculate_xp_for_level(growth_rate, user_pokemon.level + 1)
-        if user_pokemon.experience >= xp_needed:
-            user_pokemon.level += 1
-            # Recalculate stats on level up
-            new_stats = game_logic.calculate_stats(user_pokemon.pokemon.stats, user_pokemon.level)
-            for k, v in new_stats.items():
-                setattr(user_pokemon, k, v)
-        else:
-            break
-            
+    growth_rate = pokemon_growth_rate(user_pokemon.pokemon) if user_pokemon.pokemon else xp_table.DEFAULT_GROWTH_RATE
+    old_level = user_pokemon.level
+    new_level = max(old_level, xp_table.level_for_xp(growth_rate, user_pokemon.experience))
+
+    evolutions = []
+    new_moves = []
+    if new_level > old_level:
+        # Forms the Pokemon passes through, as (pokemon, first level, last level) segments
+        current = catalog.pokemon.get(user_pokemon.pokemon_id)
+        segments = []
+        start = old_level + 1
+        if current and current.species_id is not None:
+            for level, _, to_species_id in catalog.evolutions.level_up_path(current.species_id, old_level, new_level):
+                evolved = catalog.default_pokemon.get(to_species_id)
+                if evolved is None:
+                    break
+                segments.append((current, start, level))
+                evolutions.append({
+                    "level": level,
+                    "from_pokemon_id": current.id, "from_name": current.name,
+                    "to_pokemon_id": evolved.id, "to_name": evolved.name,
+                })
+                current, start = evolved, level
+        if current:
+            segments.append((current, start, new_level))
+
+        seen_moves = set()
+        for pokemon, first, last in segments:
+            for level, move_id in catalog.learnsets.get(pokemon.id).level_up(first, last):
+                move = catalog.moves.get(move_id)
+                if move and move_id not in seen_moves:
+                    seen_moves.add(move_id)
+                    new_moves.append({"move": move, "learn_method": "level-up", "level": level})
+
+        if evolutions:
+            user_pokemon.pokemon_id = current.id
+            pokemon = current
+        base_stats = current.stats if current else user_pokemon.pokemon.stats
+        user_pokemon.level = new_level
+        for k, v in game_logic.calculate_stats(base_stats, new_level).items():
+            setattr(user_pokemon, k, v)
+    user_pokemon.next_level_xp = xp_table.next_level_xp(growth_rate, user_pokemon.level)
+
+    await db.commit()
+    # The loaded pokemon relationship is stale after an evolution, so the
+    # response takes the new form from the catalog instead of re-reading the row
+    fields = {name: getattr(user_pokemon, name) for name in schemas.UserPokemonDisplay.model_fields if name != "pokemon"}
+    return schemas.UserPokemonLevelUp.model_validate(
+        {**fields, "pokemon": pokemon, "levels_gained": new_level - old_level,
+         "evolutions": evolutions, "new_moves": new_moves},
+        from_attributes=True,
+    )
+
+def recalculate_user_pokemon_stats(db: Session, user_id: int = None):
+    """
+    Recompute the stats of every owned Pokemon (or one user's box) from the
+    current base stats in a single vectorized pass and a bulk UPDATE.
+    """
+    query = db.query(models.UserPokemon.id, models.UserPokemon.level, models.Pokemon.stats).join(
+        models.Pokemon, models.UserPokemon.pokemon_id == models.Pokemon.id
+    )
+    if user_id is not None:
+        query = query.filter(models.UserPokemon.user_id == user_id)
+    rows = query.all()
+    if not rows:
+        return 0
+
+    stats = game_logic.calculate_stats_batch(
+        game_logic.base_stats_matrix([row.stats for row in rows]),
+        [row.level for row in rows],
+    )
+    db.execute(
+        update(models.UserPokemon),
+        [{"id": row.id, **game_logic.stats_to_columns(stats[i])} for i, row in enumerate(rows)],
+    )
     db.commit()
-    db.refresh(user_pokemon)
-    return user_pokemon
+    return len(rows)
 
 # World
-def get_gyms(db: Session):
-    return db.query(models.Gym).all()
-
-def get_gym(db: Session, gym_id: int):
-    return db.query(models.Gym).filter(models.Gym.id == gym_id).first()
-
-def create_gym(db: Session, gym: schemas.GymCreate):
+async def create_gym(db: AsyncSession, gym: schemas.GymCreate):
     db_gym = models.Gym(**gym.dict())
     db.add(db_gym)
-    db.commit()
-    db.refresh(db_gym)
+    await db.commit()
+    await db.refresh(db_gym)
     return db_gym
 
-def get_elite_four(db: Session):
-    return db.query(models.EliteFourMember).order_by(models.EliteFourMember.rank).all()
-
-def create_elite_four_member(db: Session, member: schemas.EliteFourMemberCreate):
+async def create_elite_four_member(db: AsyncSession, member: schemas.EliteFourMemberCreate):
     db_member = models.EliteFourMember(**member.dict())
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    await db.commit()
+    await db.refresh(db_member)
     return db_member
 
-def add_user_badge(db: Session, user_id: int, gym_id: int):
-    # Check if already earned
-    existing = db.query(models.UserBadge).filter(models.UserBadge.user_id == user_id, models.UserBadge.gym_id == gym_id).first()
-    if existing:
-        return existing
-        
-    db_badge = models.UserBadge(user_id=user_id, gym_id=gym_id)
-    db.add(db_badge)
-    db.commit()
-    db.refresh(db_badge)
-    return db_badge
+async def get_user_badge(db: AsyncSession, user_id: int, gym_id: int):
+    return await db.scalar(
+        select(models.UserBadge)
+        .options(joinedload(models.UserBadge.gym))
+        .where(models.UserBadge.user_id == user_id, models.UserBadge.gym_id == gym_id)
+    )
 
-def get_user_badges(db: Session, user_id: int):
-    return db.query(models.UserBadge).filter(models.UserBadge.user_id == user_id).all()
+async def add_user_badge(db: AsyncSession, user_id: int, gym_id: int):
+    """
+    Award a badge unless already earned (one statement on the unique
+    (user_id, gym_id) index) and return it with its gym.
+    """
+    await db.execute(
+        pg_insert(models.UserBadge)
+        .values(user_id=user_id, gym_id=gym_id)
+        .on_conflict_do_nothing(index_elements=[models.UserBadge.user_id, models.UserBadge.gym_id])
+    )
+    await db.commit()
+    return await get_user_badge(db, user_id, gym_id)
 
-def update_elite_four_progress(db: Session, user_id: int, progress: int):
-    user = get_user(db, user_id)
+async def get_user_badges(db: AsyncSession, user_id: int):
+    return (await db.scalars(select(models.UserBadge).options(joinedload(models.UserBadge.gym)).where(models.UserBadge.user_id == user_id))).all()
+
+async def update_elite_four_progress(db: AsyncSession, user_id: int, progress: int):
+    user = await get_user(db, user_id)
     if user:
         user.elite_four_progress = progress
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        principals.cache.invalidate(user_id)
+        await db.refresh(user)
     return user
 
-def set_champion(db: Session, user_id: int, is_champion: bool = True):
-    user = get_user(db, user_id)
+async def set_champion(db: AsyncSession, user_id: int, is_champion: bool = True):
+    user = await get_user(db, user_id)
     if user:
         user.is_champion = is_champion
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        principals.cache.invalidate(user_id)
+        await db.refresh(user)
     return user
 
 # Shop
-def get_items(db: Session):
-    return db.query(models.Item).all()
-
-def get_item(db: Session, item_id: int):
-    return db.query(models.Item).filter(models.Item.id == item_id).first()
-
-def get_user_items(db: Session, user_id: int):
-    return db.query(models.UserItem).filter(models.UserItem.user_id == user_id).all()
-
-def add_user_item(db: Session, user_id: int, item_id: int, quantity: int):
-    existing = db.query(models.UserItem).filter(models.UserItem.user_id == user_id, models.UserItem.item_id == item_id).first()
-    if existing:
-        existing.quantity += quantity
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        max_id = db.query(func.max(models.UserItem.id)).scalar() or 0
-        user_item = models.UserItem(id=max_id + 1, user_id=user_id, item_id=item_id, quantity=quantity)
-        db.add(user_item)
-        db.commit()
-        db.refresh(user_item)
-        return user_item
-
-def remove_user_item(db: Session, user_id: int, item_id: int, quantity: int = 1):
-    existing = db.query(models.UserItem).filter(models.UserItem.user_id == user_id, models.UserItem.item_id == item_id).first()
-    if existing and existing.quantity >= quantity:
-        existing.quantity -= quantity
-        db.commit()
-        db.refresh(existing)
-        return True
-    return False
-
-def deduct_money(db: Session, user_id: int, amount: int):
-    user = get_user(db, user_id)
-    if user.money >= amount:
-        user.money -= amount
-        db.commit()
-        db.refresh(user)
-        return True
-    return False
+async def get_user_items(db: AsyncSession, user_id: int):
+    return (await db.scalars(select(models.UserItem).options(joinedload(models.UserItem.item)).where(models.UserItem.user_id == user_id))).all()
+
+async def add_user_item(db: AsyncSession, user_id: int, item_id: int, quantity: int, commit: bool = True):
+    """
+    Grant items with a single upsert on (user_id, item_id).
+    """
+    stmt = pg_insert(models.UserItem).values(user_id=user_id, item_id=item_id, quantity=quantity)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.UserItem.user_id, models.UserItem.item_id],
+        set_={"quantity": models.UserItem.quantity + stmt.excluded.quantity},
+    ).returning(models.UserItem)
+    user_item = (await db.scalars(stmt, execution_options={"populate_existing": True})).one()
+    if commit:
+        await db.commit()
+    return user_item
+
+async def remove_user_item(db: AsyncSession, user_id: int, item_id: int, quantity: int = 1, commit: bool = True):
+    """
+    Take items only if the user holds enough; returns False otherwise.
+    """
+    removed = (await db.execute(
+        update(models.UserItem)
+        .where(models.UserItem.user_id == user_id, models.UserItem.item_id == item_id, models.UserItem.quantity >= quantity)
+        .values(quantity=models.UserItem.quantity - quantity)
+        .returning(models.UserItem.id)
+    )).first()
+    if commit:
+        await db.commit()
+    return removed is not None
+
+async def deduct_money(db: AsyncSession, user_id: int, amount: int, commit: bool = True):
+    """
+    Spend money only if the user can afford it; returns False otherwise.
+    With commit=False the caller commits and invalidates the principal cache.
+    """
+    spent = (await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.money >= amount)
+        .values(money=models.User.money - amount)
+        .returning(models.User.money)
+    )).first()
+    if commit:
+        await db.commit()
+        principals.cache.invalidate(user_id)
+    return spent is not None
+
+async def add_money(db: AsyncSession, user_id: int, amount: int, commit: bool = True):
+    await db.execute(update(models.User).where(models.User.id == user_id).values(money=models.User.money + amount))
+    if commit:
+        await db.commit()
+        principals.cache.invalidate(user_id)
+
+async def purchase_item(db: AsyncSession, user_id: int, item_id: int, quantity: int, cost: int):
+    """
+    Charge cost and grant the items in one transaction. Returns the updated
+    bag row, or None (and changes nothing) if the user cannot afford it.
+    """
+    if not await deduct_money(db, user_id, cost, commit=False):
+        await db.rollback()
+        return None
+    user_item = await add_user_item(db, user_id, item_id, quantity, commit=False)
+    await db.commit()
+    principals.cache.invalidate(user_id)
+    await db.refresh(user_item, ["item"])
+    return user_item
 
 # Favorites
-def get_user_favorites(db: Session, user_id: int):
-    return db.query(models.UserFavorite).filter(models.UserFavorite.user_id == user_id).all()
+async def get_user_favorites(db: AsyncSession, user_id: int, fields=None):
+    return (await db.scalars(select(models.UserFavorite).options(pokemon_loader(models.UserFavorite.pokemon, fields)).where(models.UserFavorite.user_id == user_id))).all()
+
+async def get_user_favorite(db: AsyncSession, user_id: int, pokemon_id: int):
+    return await db.scalar(
+        select(models.UserFavorite)
+        .options(pokemon_loader(models.UserFavorite.pokemon))
+        .where(models.UserFavorite.user_id == user_id, models.UserFavorite.pokemon_id == pokemon_id)
+    )
 
-def add_user_favorite(db: Session, user_id: int, pokemon_id: int):
-    existing = db.query(models.UserFavorite).filter(models.UserFavorite.user_id == user_id, models.UserFavorite.pokemon_id == pokemon_id).first()
-    if existing:
-        return existing
-    
-    db_favorite = models.UserFavorite(user_id=user_id, pokemon_id=pokemon_id)
-    db.add(db_favorite)
-    db.commit()
-    db.refresh(db_favorite)
-    return db_favorite
+async def add_user_favorite(db: AsyncSession, user_id: int, pokemon_id: int):
+    await db.execute(
+        pg_insert(models.UserFavorite)
+        .values(user_id=user_id, pokemon_id=pokemon_id)
+        .on_conflict_do_nothing(index_elements=[models.UserFavorite.user_id, models.UserFavorite.pokemon_id])
+    )
+    await db.commit()
+    return await get_user_favorite(db, user_id, pokemon_id)
 
-def remove_user_favorite(db: Session, user_id: int, pokemon_id: int):
-    db_favorite = db.query(models.UserFavorite).filter(models.UserFavorite.user_id == user_id, models.UserFavorite.pokemon_id == pokemon_id).first()
+async def remove_user_favorite(db: AsyncSession, user_id: int, pokemon_id: int):
+    db_favorite = await db.scalar(select(models.UserFavorite).where(models.UserFavorite.user_id == user_id, models.UserFavorite.pokemon_id == pokemon_id))
     if db_favorite:
-        db.delete(db_favorite)
-        db.commit()
+        await db.delete(db_favorite)
+        await db.commit()
         return True
     return False
 
-# Berries
-def get_berries(db: Session):
-    return db.query(models.Berry).all()
-
 # Seen Pokemon
-def add_user_seen(db: Session, user_id: int, pokemon_id: int):
-    existing = db.query(models.UserSeen).filter(models.UserSeen.user_id == user_id, models.UserSeen.pokemon_id == pokemon_id).first()
-    if existing:
-        return existing
-    
-    db_seen = models.UserSeen(user_id=user_id, pokemon_id=pokemon_id)
-    db.add(db_seen)
-    db.commit()
-    db.refresh(db_seen)
+async def add_user_seen(db: AsyncSession, user_id: int, pokemon_id: int):
+    """
+    Mark a Pokemon as seen. A new row comes back from the insert itself; only
+    an already-seen Pokemon needs a second statement.
+    """
+    db_seen = (await db.scalars(
+        pg_insert(models.UserSeen)
+        .values(user_id=user_id, pokemon_id=pokemon_id)
+        .on_conflict_do_nothing(index_elements=[models.UserSeen.user_id, models.UserSeen.pokemon_id])
+        .returning(models.UserSeen)
+    )).first()
+    if db_seen is None:
+        db_seen = await db.scalar(select(models.UserSeen).where(models.UserSeen.user_id == user_id, models.UserSeen.pokemon_id == pokemon_id))
+    await db.commit()
     return db_seen
 
-def get_user_seen_ids(db: Session, user_id: int):
-    seen = db.query(models.UserSeen).filter(models.UserSeen.user_id == user_id).all()
+async def get_user_seen_ids(db: AsyncSession, user_id: int):
+    seen = (await db.scalars(select(models.UserSeen).where(models.UserSeen.user_id == user_id))).all()
     return [s.pokemon_id for s in seen]
 
 # Stats
-def get_user_stats(db: Session, user_id: int):
-    history = db.query(models.BattleHistory).filter(models.BattleHistory.user_id == user_id).all()
+async def get_user_stats(db: AsyncSession, user_id: int):
+    history = (await db.scalars(select(models.BattleHistory).where(models.BattleHistory.user_id == user_id))).all()
     total_battles = len(history)
     battles_won = sum(1 for b in history if b.won or b.result == 'VICTORY')
     
-    user = get_user(db, user_id)
-    total_caught = db.query(models.UserPokemon).filter(models.UserPokemon.user_id == user_id).count()
-    total_seen = db.query(models.UserSeen).filter(models.UserSeen.user_id == user_id).count()
+    user = await get_user(db, user_id)
+    total_caught = await db.scalar(select(func.count()).select_from(models.UserPokemon).where(models.UserPokemon.user_id == user_id))
+    total_seen = await db.scalar(select(func.count()).select_from(models.UserSeen).where(models.UserSeen.user_id == user_id))
     
     return {
         "total_battles": total_battles,
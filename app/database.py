@@ -1,5 +1,10 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, make_url, exc, text, inspect
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -25,19 +30,180 @@ if not DATABASE_URL:
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+def async_database_url(url: str):
+    """
+    The same database through asyncpg. asyncpg spells sslmode as ssl.
+    """
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+    return url
+
+# Connection pool settings for the request engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Replace connections older than this many seconds (-1 keeps them forever)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Per-statement limit for request queries in milliseconds (0 disables it)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "pokedex-backend")
+
+class PoolStats:
+    """
+    Checkout counters for one engine's pool, fed by the pool classes below.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "timeout_seconds": pool.timeout(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": self.total_wait / waits * 1000 if waits else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+class _TimedCheckout:
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started, timed_out=False)
+        return connection
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    stats = PoolStats()
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+# Create engine (scripts, seeders and the catalog loader). Keeps the default
+# pool size and no statement timeout, since migrations and seeding run long.
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args={"application_name": DB_APPLICATION_NAME},
+)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers. Sessions keep loaded attributes after
+# commit, since an expired attribute cannot be lazily reloaded under asyncio.
+_server_settings = {"application_name": DB_APPLICATION_NAME}
+if DB_STATEMENT_TIMEOUT_MS > 0:
+    _server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    poolclass=TimedAsyncQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"server_settings": _server_settings},
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
-# Dependency for routes
-def get_db():
-    db = SessionLocal()
-    try:
+# Columns added to existing tables after the first deploy. create_all does not
+# add them, and the catalog loader selects them, so the app applies these on
+# startup as well as in migrate_db.py. Each statement is idempotent.
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE pokemon ADD COLUMN IF NOT EXISTS growth_rate VARCHAR",
+    "ALTER TABLE user_pokemon ADD COLUMN IF NOT EXISTS next_level_xp INTEGER DEFAULT 0",
+    "ALTER TABLE pokemon_species ADD COLUMN IF NOT EXISTS is_legendary BOOLEAN DEFAULT FALSE",
+    "ALTER TABLE pokemon_species ADD COLUMN IF NOT EXISTS is_mythical BOOLEAN DEFAULT FALSE",
+]
+
+# Rows a unique index would reject, removed right before that index is created
+# on an existing table. The upserts in crud rely on these indexes.
+INDEX_DEDUPES = {
+    # Merge duplicate bag rows into the first one
+    "uq_user_items_user_item": [
+        """UPDATE user_items SET quantity = merged.total
+           FROM (SELECT MIN(id) AS keep_id, SUM(quantity) AS total FROM user_items
+                 GROUP BY user_id, item_id HAVING COUNT(*) > 1) AS merged
+           WHERE user_items.id = merged.keep_id""",
+        """DELETE FROM user_items USING user_items AS kept
+           WHERE user_items.user_id = kept.user_id AND user_items.item_id = kept.item_id AND user_items.id > kept.id""",
+    ],
+    # Keep the first badge, favorite and seen row per pair
+    "uq_user_badges_user_gym": [
+        """DELETE FROM user_badges USING user_badges AS kept
+           WHERE user_badges.user_id = kept.user_id AND user_badges.gym_id = kept.gym_id AND user_badges.id > kept.id""",
+    ],
+    "uq_user_favorites_user_pokemon": [
+        """DELETE FROM user_favorites USING user_favorites AS kept
+           WHERE user_favorites.user_id = kept.user_id AND user_favorites.pokemon_id = kept.pokemon_id
+             AND user_favorites.id > kept.id""",
+    ],
+    "uq_user_seen_user_pokemon": [
+        """DELETE FROM user_seen USING user_seen AS kept
+           WHERE user_seen.user_id = kept.user_id AND user_seen.pokemon_id = kept.pokemon_id AND user_seen.id > kept.id""",
+    ],
+}
+
+def create_schema():
+    """
+    Create missing tables, columns and indexes.
+    """
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in COLUMN_MIGRATIONS:
+            conn.execute(text(statement))
+        # create_all only creates indexes together with a new table
+        existing = {
+            index["name"]
+            for indexes in inspect(conn).get_multi_indexes().values()
+            for index in indexes
+        }
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    for statement in INDEX_DEDUPES.get(index.name, []):
+                        conn.execute(text(statement))
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+
+# Dependency for routes (app.dependencies re-exports it)
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+def pool_stats() -> dict:
+    return {
+        "requests": TimedAsyncQueuePool.stats.snapshot(async_engine.pool),
+        "background": TimedQueuePool.stats.snapshot(engine.pool),
+    }
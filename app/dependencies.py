@@ -1,33 +1,71 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from . import crud, models, schemas, auth, database
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from . import crud, schemas, auth, projection, principals
+from .database import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise CREDENTIALS_EXCEPTION
         token_data = schemas.TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
+        raise CREDENTIALS_EXCEPTION
+    return token_data.username
+
+async def _load_principal(db: AsyncSession, username: str) -> principals.Principal:
+    generation = principals.cache.generation
+    user = await crud.get_user_by_username(db, username=username)
     if user is None:
-        raise credentials_exception
-    return user
+        raise CREDENTIALS_EXCEPTION
+    principal = principals.Principal.from_user(user)
+    principals.cache.put(principal, generation)
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> principals.Principal:
+    """
+    The authenticated user as a cached principal with up-to-date money and progress.
+    """
+    username = _token_subject(token)
+    return principals.cache.get(username) or await _load_principal(db, username)
+
+async def get_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> principals.Principal:
+    """
+    Lightweight get_current_user for handlers that only use the user's id:
+    entries made stale by a money or progress write are still good enough.
+    """
+    username = _token_subject(token)
+    return principals.cache.get(username, fresh=False) or await _load_principal(db, username)
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """
+    Guard for the internal metrics endpoints: 404 unless METRICS_TOKEN is
+    configured, 401 unless the request sends it in X-Metrics-Token.
+    """
+    if auth.METRICS_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_metrics_token is None or not secrets.compare_digest(x_metrics_token, auth.METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+async def get_pokemon_projection(fields: Optional[str] = None, exclude: Optional[str] = None):
+    """
+    Parse fields/exclude for endpoints that nest a Pokemon in their payload.
+    Returns None when the full Pokemon was requested.
+    """
+    try:
+        return projection.parse_projection(schemas.PokemonBase, fields, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,102 @@
+"""
+Weighted wild encounters drawn from the catalog with Walker alias tables.
+
+Every pool (all Pokemon, or one generation by name or id) gets an alias table
+built once per catalog load, so a draw is one random index and one coin flip
+regardless of pool size, and `count` draws are a single vectorized call.
+Weights follow how common a species is in the games: capture_rate, with
+babies and legendary/mythical species made much rarer.
+"""
+import threading
+
+import numpy as np
+
+DEFAULT_POOL = "1" # Generation I, the encounter range before pools existed
+ALL_POOL = "all"
+BABY_WEIGHT = 0.25
+LEGENDARY_WEIGHT = 0.01
+# Databases seeded before the legendary flags existed: treat the hardest catches as legendary
+LEGENDARY_CAPTURE_RATE = 3
+
+_local = threading.local()
+
+def _rng() -> np.random.Generator:
+    # numpy Generators are not thread-safe; keep one per worker thread
+    rng = getattr(_local, "rng", None)
+    if rng is None:
+        rng = _local.rng = np.random.default_rng()
+    return rng
+
+class AliasTable:
+    def __init__(self, weights):
+        """
+        Vose's alias method over non-negative weights.
+        """
+        weights = np.asarray(weights, dtype=float)
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        self.probability = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1]
+        large = [i for i in range(n) if scaled[i] >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # Whatever is left is 1 up to rounding error
+
+    def sample(self, rng, count: int) -> np.ndarray:
+        columns = rng.integers(len(self.probability), size=count)
+        keep = rng.random(count) < self.probability[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+def encounter_weight(species, legendary_flags: bool) -> float:
+    weight = float(species.capture_rate or 45)
+    if species.is_baby:
+        weight *= BABY_WEIGHT
+    if legendary_flags:
+        legendary = species.is_legendary or species.is_mythical
+    else:
+        legendary = (species.capture_rate or 45) <= LEGENDARY_CAPTURE_RATE
+    if legendary:
+        weight *= LEGENDARY_WEIGHT
+    return max(weight, 0.01)
+
+class EncounterPools:
+    def __init__(self, pokemon: dict):
+        # One encounterable Pokemon (the default form) per species
+        by_species = {}
+        for p in sorted(pokemon.values(), key=lambda p: (p.is_default is False, p.id)):
+            if p.species is not None:
+                by_species.setdefault(p.species.id, p)
+        candidates = sorted(by_species.values(), key=lambda p: p.id)
+        legendary_flags = any(p.species.is_legendary or p.species.is_mythical for p in candidates)
+
+        members = {ALL_POOL: candidates}
+        for p in candidates:
+            if p.species.generation_id is not None:
+                members.setdefault(str(p.species.generation_id), []).append(p)
+            if p.species.generation_name:
+                members.setdefault(p.species.generation_name, []).append(p)
+
+        self.pools = {}
+        for name, entries in members.items():
+            weights = [encounter_weight(p.species, legendary_flags) for p in entries]
+            self.pools[name] = (tuple(entries), AliasTable(weights))
+
+    def draw(self, pool: str = DEFAULT_POOL, count: int = 1):
+        """
+        count weighted random Pokemon from pool, or None for an unknown pool.
+        The default pool falls back to every Pokemon when Generation I is missing.
+        """
+        if pool == DEFAULT_POOL and pool not in self.pools:
+            pool = ALL_POOL
+        if pool not in self.pools:
+            return None
+        entries, table = self.pools[pool]
+        if not entries:
+            return []
+        return [entries[i] for i in table.sample(_rng(), count).tolist()]
@@ -0,0 +1,150 @@
+"""
+Evolution graph over the catalog species.
+
+Edges come from the evolution_edges table (every branch and trigger); older
+databases without edges fall back to PokemonSpecies.evolves_from_species_id.
+Ancestors, descendants and the full family tree of every species are
+precomputed, so a chain lookup is a dict access instead of one query per hop.
+"""
+from collections import defaultdict, deque
+from typing import NamedTuple, Optional
+
+# evolution_details keys level_up_path understands; any other set key
+# (gender, time_of_day, relative_physical_stats, needs_overworld_rain, ...)
+# is a condition it cannot check
+PLAIN_DETAIL_KEYS = frozenset({"trigger", "min_level", "item"})
+
+class EvolutionEdgeEntry(NamedTuple):
+    from_species_id: int
+    to_species_id: int
+    trigger: Optional[str]
+    min_level: Optional[int]
+    item_name: Optional[str]
+    # True when the stored PokeAPI details carry any other condition
+    conditional: bool = False
+
+def has_extra_conditions(details) -> bool:
+    """
+    Whether a raw evolution_details entry sets anything besides trigger, min_level and item.
+    """
+    if not details:
+        return False
+    # 0 is a real condition (relative_physical_stats), so compare by identity
+    return any(
+        not (value is None or value is False or value == "")
+        for key, value in details.items() if key not in PLAIN_DETAIL_KEYS
+    )
+
+def _edges_from_species(species: dict):
+    for s in species.values():
+        if s.evolves_from_species_id is None:
+            continue
+        parent = species.get(s.evolves_from_species_id)
+        level = parent.evolution_level if parent and parent.evolution_species_id == s.id else None
+        yield EvolutionEdgeEntry(s.evolves_from_species_id, s.id, "level-up" if level else None, level, None)
+
+class EvolutionGraph:
+    def __init__(self, species: dict, edges):
+        edges = [e for e in edges if e.from_species_id in species and e.to_species_id in species]
+        if not edges:
+            edges = list(_edges_from_species(species))
+
+        triggers = defaultdict(list)
+        children = defaultdict(set)
+        parent = {}
+        for edge in edges:
+            triggers[edge.from_species_id, edge.to_species_id].append(edge)
+            children[edge.from_species_id].add(edge.to_species_id)
+            parent.setdefault(edge.to_species_id, edge.from_species_id)
+        self.triggers = {k: tuple(v) for k, v in triggers.items()}
+        self.children = {k: tuple(sorted(v)) for k, v in children.items()}
+        self.parent = parent
+
+        self.ancestors = {}
+        self.descendants = {}
+        self.root = {}
+        for species_id in species:
+            chain, seen = [], {species_id}
+            current = parent.get(species_id)
+            while current is not None and current not in seen:
+                chain.append(current)
+                seen.add(current)
+                current = parent.get(current)
+            self.ancestors[species_id] = tuple(reversed(chain))
+            self.root[species_id] = chain[-1] if chain else species_id
+
+            found, queue, seen = [], deque(self.children.get(species_id, ())), {species_id}
+            while queue:
+                child = queue.popleft()
+                if child in seen:
+                    continue
+                seen.add(child)
+                found.append(child)
+                queue.extend(self.children.get(child, ()))
+            self.descendants[species_id] = tuple(found)
+
+        self.trees = {}
+        for root in set(self.root.values()):
+            self.trees[root] = self._tree(species, root, 0, None, {root})
+
+    def _tree(self, species, species_id, depth, from_id, seen):
+        triggers = self.triggers.get((from_id, species_id), ())
+        evolves_to = []
+        for child in self.children.get(species_id, ()):
+            if child not in seen:
+                evolves_to.append(self._tree(species, child, depth + 1, species_id, seen | {child}))
+        return {
+            "species_id": species_id,
+            "name": species[species_id].name,
+            "depth": depth,
+            "triggers": [
+                {"trigger": e.trigger, "min_level": e.min_level, "item_name": e.item_name}
+                for e in triggers if e.trigger or e.min_level or e.item_name
+            ],
+            "evolves_to": evolves_to,
+        }
+
+    def level_up_path(self, species_id: int, from_level: int, to_level: int):
+        """
+        Evolutions triggered by leveling from from_level to to_level, as
+        [(level, from_species_id, to_species_id)]. Only plain level-up edges
+        (a min_level, no item and no other condition) are followed. On a branch
+        the lowest min_level wins; if several children tie, the path stops
+        rather than guess.
+        """
+        path, seen = [], {species_id}
+        level = from_level + 1
+        while level <= to_level:
+            candidates = [
+                (edge.min_level, child)
+                for child in self.children.get(species_id, ())
+                if child not in seen
+                for edge in self.triggers.get((species_id, child), ())
+                if edge.trigger == "level-up" and edge.min_level and not edge.item_name and not edge.conditional
+            ]
+            if not candidates:
+                break
+            min_level, child = min(candidates)
+            if len({c for m, c in candidates if m == min_level}) > 1:
+                break
+            level = max(level, min_level)
+            if level > to_level:
+                break
+            path.append((level, species_id, child))
+            seen.add(child)
+            species_id = child
+        return path
+
+    def chain(self, species_id: int):
+        """
+        The whole family of species_id, or None if the species is unknown.
+        """
+        if species_id not in self.root:
+            return None
+        return {
+            "species_id": species_id,
+            "root_species_id": self.root[species_id],
+            "ancestors": list(self.ancestors[species_id]),
+            "descendants": list(self.descendants[species_id]),
+            "chain": self.trees[self.root[species_id]],
+        }
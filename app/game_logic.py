@@ -1,59 +1,83 @@
-import math
+import numpy as np
+
+from . import xp_table
 
 def calculate_xp_for_level(growth_rate: str, level: int) -> int:
     """
     Calculate the total XP required to reach a specific level based on growth rate.
-    Formulas based on Gen 3 mechanics.
+    Formulas based on Gen 3 mechanics, read from the precomputed xp_table.
     """
-    if level <= 1:
-        return 0
-    
-    n = level
-    
-    if growth_rate == "erratic":
-        if n <= 50:
-            return int((n**3 * (100 - n)) / 50)
-        elif n <= 68:
-            return int((n**3 * (150 - n)) / 100)
-        elif n <= 98:
-            return int((n**3 * math.floor((1911 - 10 * n) / 3)) / 500)
-        else:
-            return int((n**3 * (160 - n)) / 100)
-            
-    elif growth_rate == "fast":
-        return int(4 * n**3 / 5)
-        
-    elif growth_rate == "medium-fast": # Normal Medium
-        return int(n**3)
-        
-    elif growth_rate == "medium-slow":
-        return int(6/5 * n**3 - 15 * n**2 + 100 * n - 140)
-        
-    elif growth_rate == "slow":
-        return int(5 * n**3 / 4)
-        
-    elif growth_rate == "fluctuating":
-        if n <= 15:
-            return int(n**3 * (math.floor((n + 1) / 3) + 24) / 50)
-        elif n <= 36:
-            return int(n**3 * (n + 14) / 50)
-        else:
-            return int(n**3 * (math.floor(n / 2) + 32) / 50)
-            
-    else:
-        # Default to medium-fast if unknown
-        return int(n**3)
+    return xp_table.xp_for_level(growth_rate, level)
 
 def calculate_level_from_xp(growth_rate: str, xp: int) -> int:
     """
     Calculate the level from total XP.
-    This is a naive implementation iterating up to 100.
     """
-    for level in range(1, 101):
-        required_xp = calculate_xp_for_level(growth_rate, level)
-        if xp < required_xp:
-            return level - 1
-    return 100
+    return xp_table.level_for_xp(growth_rate, xp)
+
+# Stat order of every stat matrix; PokeAPI stat ids 1-6 follow the same order
+STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+STAT_COLUMNS = ("max_hp", "attack", "defense", "special_attack", "special_defense", "speed")
+DEFAULT_BASE_STAT = 10
+DEFAULT_IV = 31
+
+def base_stats_matrix(base_stats_list) -> np.ndarray:
+    """
+    Stack Pokemon.stats dicts into an (N, 6) integer matrix.
+    """
+    return np.array(
+        [[(base_stats or {}).get(name, DEFAULT_BASE_STAT) for name in STAT_NAMES] for base_stats in base_stats_list],
+        dtype=np.int64,
+    ).reshape(-1, len(STAT_NAMES))
+
+def nature_multipliers(natures) -> np.ndarray:
+    """
+    (N, 6) multipliers for rows of the natures table (or None for no nature):
+    1.1 on increased_stat_id, 0.9 on decreased_stat_id. Neutral natures have both
+    set to the same stat or to None and stay at 1.0.
+    """
+    natures = list(natures)
+    multipliers = np.ones((len(natures), len(STAT_NAMES)))
+    for i, nature in enumerate(natures):
+        if nature is None or nature.increased_stat_id == nature.decreased_stat_id:
+            continue
+        if nature.increased_stat_id:
+            multipliers[i, nature.increased_stat_id - 1] = 1.1
+        if nature.decreased_stat_id:
+            multipliers[i, nature.decreased_stat_id - 1] = 0.9
+    return multipliers
+
+def calculate_stats_batch(base_stats, levels, ivs=DEFAULT_IV, evs=0, natures=None) -> np.ndarray:
+    """
+    Gen 3 stat formula for many Pokemon at once.
+    base_stats: (N, 6) array (see base_stats_matrix). levels: (N,).
+    ivs / evs: scalars, (N,) or (N, 6). natures: optional (N, 6) multipliers
+    (see nature_multipliers). Returns an (N, 6) integer matrix in STAT_NAMES order.
+    """
+    base_stats = np.asarray(base_stats, dtype=np.int64).reshape(-1, len(STAT_NAMES))
+    levels = np.asarray(levels, dtype=np.int64).reshape(-1, 1)
+    ivs = np.asarray(ivs, dtype=np.int64)
+    evs = np.asarray(evs, dtype=np.int64)
+    if ivs.ndim == 1:
+        ivs = ivs[:, None]
+    if evs.ndim == 1:
+        evs = evs[:, None]
+
+    scaled = (2 * base_stats + ivs + evs // 4) * levels // 100
+    stats = scaled + 5
+    stats[:, 0] = scaled[:, 0] + levels[:, 0] + 10
+    if natures is not None:
+        # HP is never affected by nature
+        stats[:, 1:] = np.floor(stats[:, 1:] * np.asarray(natures)[:, 1:])
+    return stats
+
+def stats_to_columns(row) -> dict:
+    """
+    One row of a stat matrix as UserPokemon column values (at full HP).
+    """
+    stats = {column: int(value) for column, value in zip(STAT_COLUMNS, row)}
+    stats["current_hp"] = stats["max_hp"]
+    return stats
 
 def calculate_stats(base_stats: dict, level: int):
     """
@@ -61,18 +85,4 @@ def calculate_stats(base_stats: dict, level: int):
     Simplified Gen 3 formula.
     """
     # { "hp": 45, "attack": 49, ... }
-    stats = {}
-    
-    # HP
-    base_hp = base_stats.get("hp", 10)
-    stats["max_hp"] = math.floor(0.01 * (2 * base_hp + 31) * level) + level + 10
-    stats["current_hp"] = stats["max_hp"]
-    
-    # Others
-    for stat_name in ["attack", "defense", "special-attack", "special-defense", "speed"]:
-        base = base_stats.get(stat_name, 10)
-        # Convert hyphenated names to underscored for model compatibility
-        key = stat_name.replace("-", "_")
-        stats[key] = math.floor(0.01 * (2 * base + 31) * level) + 5
-        
-    return stats
+    return stats_to_columns(calculate_stats_batch(base_stats_matrix([base_stats]), [level])[0])
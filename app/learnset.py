@@ -0,0 +1,66 @@
+"""
+Compact per-Pokemon learnsets built from pokemon_moves.
+
+Level-up moves are stored as two parallel arrays sorted by level, so "moves
+learned between level A and B" is two bisects and a slice. Moves learned by
+other methods (machine, tutor, egg, ...) are kept as tuples of move ids per method.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+LEVEL_UP = "level-up"
+
+class Learnset:
+    __slots__ = ("levels", "level_move_ids", "by_method")
+
+    def __init__(self, level_moves, by_method):
+        level_moves.sort()
+        self.levels = array("H", (level for level, _ in level_moves))
+        self.level_move_ids = array("I", (move_id for _, move_id in level_moves))
+        self.by_method = {method: tuple(sorted(move_ids)) for method, move_ids in by_method.items()}
+
+    def level_up(self, min_level=None, max_level=None):
+        """
+        [(level, move_id)] for level-up moves with min_level <= level <= max_level.
+        """
+        start = bisect_left(self.levels, min_level) if min_level is not None else 0
+        end = bisect_right(self.levels, max_level) if max_level is not None else len(self.levels)
+        return list(zip(self.levels[start:end], self.level_move_ids[start:end]))
+
+class LearnsetIndex:
+    def __init__(self, rows):
+        """
+        rows: iterable of (pokemon_id, move_id, learn_method, level_learned_at).
+        """
+        level_moves = defaultdict(list)
+        by_method = defaultdict(lambda: defaultdict(list))
+        for pokemon_id, move_id, method, level in rows:
+            if method == LEVEL_UP:
+                level_moves[pokemon_id].append((level or 0, move_id))
+            else:
+                by_method[pokemon_id][method or "unknown"].append(move_id)
+        self._learnsets = {
+            pokemon_id: Learnset(level_moves.get(pokemon_id, []), by_method.get(pokemon_id, {}))
+            for pokemon_id in set(level_moves) | set(by_method)
+        }
+        self._empty = Learnset([], {})
+
+    def get(self, pokemon_id: int) -> Learnset:
+        return self._learnsets.get(pokemon_id, self._empty)
+
+    def moves(self, pokemon_id: int, method=None, min_level=None, max_level=None):
+        """
+        [(move_id, method, level)] for a Pokemon. Level bounds only apply to
+        level-up moves, so passing one restricts the result to them.
+        """
+        learnset = self.get(pokemon_id)
+        result = []
+        if method in (None, LEVEL_UP):
+            result.extend((move_id, LEVEL_UP, level) for level, move_id in learnset.level_up(min_level, max_level))
+        if min_level is None and max_level is None:
+            for other_method, move_ids in learnset.by_method.items():
+                if method is None or method == other_method:
+                    result.extend((move_id, other_method, None) for move_id in move_ids)
+        return result
+
@@ -1,12 +1,27 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .database import engine, Base
-from .routers import pokemon, auth, users, game, world, shop, berries
+from .database import async_engine, create_schema
+from . import catalog, battle
+from .auth import password_hasher
+from .routers import pokemon, auth, users, game, world, shop, berries, species, metrics
 
-Base.metadata.create_all(bind=engine)
+create_schema()
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Pokedex API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reference data is served from memory; load it before taking traffic
+    await asyncio.to_thread(catalog.load_catalog)
+    watcher = asyncio.create_task(catalog.watch_catalog_version())
+    yield
+    watcher.cancel()
+    battle.shutdown()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(title="Pokedex API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +38,8 @@ app.include_router(game.router)
 app.include_router(world.router)
 app.include_router(shop.router)
 app.include_router(berries.router)
+app.include_router(species.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
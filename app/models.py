@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, JSON, Boolean, DateTime, ForeignKey, Table, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, JSON, Boolean, DateTime, ForeignKey, Table, Float, Index
+from sqlalchemy.orm import relationship, column_property
 from datetime import datetime
 from .database import Base
 
@@ -82,6 +82,8 @@ class PokemonSpecies(Base):
     capture_rate = Column(Integer)
     base_happiness = Column(Integer)
     is_baby = Column(Boolean)
+    is_legendary = Column(Boolean, default=False)
+    is_mythical = Column(Boolean, default=False)
     hatch_counter = Column(Integer)
     has_gender_differences = Column(Boolean)
     growth_rate_id = Column(Integer, ForeignKey("growth_rates.id"))
@@ -107,6 +109,21 @@ class PokemonSpecies(Base):
     next_evolution = relationship("PokemonSpecies", 
                                   foreign_keys=[evolution_species_id])
 
+class EvolutionEdge(Base):
+    """
+    One way a species evolves into another. Branching families (Eevee, Tyrogue...)
+    have one row per branch and per trigger, unlike PokemonSpecies.evolution_species_id.
+    """
+    __tablename__ = "evolution_edges"
+    id = Column(Integer, primary_key=True, index=True)
+    chain_id = Column(Integer, index=True, nullable=True)
+    from_species_id = Column(Integer, ForeignKey("pokemon_species.id"), index=True)
+    to_species_id = Column(Integer, ForeignKey("pokemon_species.id"), index=True)
+    trigger = Column(String, nullable=True) # level-up, use-item, trade, ...
+    min_level = Column(Integer, nullable=True)
+    item_name = Column(String, nullable=True)
+    details = Column(JSON, nullable=True) # Raw PokeAPI evolution_details entry
+
 class Pokemon(Base):
     __tablename__ = "pokemon"
     id = Column(Integer, primary_key=True, index=True)
@@ -122,6 +139,10 @@ class Pokemon(Base):
     sprites = Column(JSON)
     # Store stats as JSON for simple access, but could also relate to Stat table
     stats = Column(JSON) 
+    # Growth rate name copied from the species (see crud.sync_pokemon_growth_rates)
+    growth_rate = Column(String, nullable=True)
+    # Front sprite URL extracted in SQL, so list views can skip the sprites blob
+    front_sprite = column_property(sprites["front_default"].as_string(), deferred=True)
     
     species = relationship("PokemonSpecies", back_populates="varieties")
     types = relationship("Type", secondary=pokemon_types)
@@ -181,6 +202,14 @@ class Berry(Base):
     
     item = relationship("Item")
 
+# Stamp of the seeded reference data; the seeders bump it so running
+# servers know to reload their in-memory catalog (see app/catalog.py)
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True)
+    stamp = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # User & Gameplay Models (Preserved)
 class User(Base):
     __tablename__ = "users"
@@ -213,6 +242,8 @@ class UserPokemon(Base):
     experience = Column(Integer, default=0)
     acquired_at = Column(DateTime, default=datetime.utcnow)
     is_in_party = Column(Boolean, default=False)
+    # Total XP for the next level, kept in sync whenever level or growth rate changes
+    next_level_xp = Column(Integer, default=0)
     
     # Current Stats (Calculated based on level and base stats)
     current_hp = Column(Integer, default=10)
@@ -226,6 +257,9 @@ class UserPokemon(Base):
     owner = relationship("User", back_populates="pokemons")
     pokemon = relationship("Pokemon")
 
+# A user's box and party (get_user_pokemons, get_user_party)
+Index("ix_user_pokemon_user_party", UserPokemon.user_id, UserPokemon.is_in_party)
+
 class BattleHistory(Base):
     __tablename__ = "battle_history"
     id = Column(Integer, primary_key=True, index=True)
@@ -237,6 +271,9 @@ class BattleHistory(Base):
 
     user = relationship("User", back_populates="battles")
 
+# A user's battle history, newest last
+Index("ix_battle_history_user_date", BattleHistory.user_id, BattleHistory.battle_date)
+
 class Gym(Base):
     __tablename__ = "gyms"
     id = Column(Integer, primary_key=True, index=True)
@@ -265,6 +302,9 @@ class UserBadge(Base):
     user = relationship("User", back_populates="badges")
     gym = relationship("Gym")
 
+# One badge per (user, gym); add_user_badge inserts ON CONFLICT DO NOTHING
+Index("uq_user_badges_user_gym", UserBadge.user_id, UserBadge.gym_id, unique=True)
+
 class UserItem(Base):
     __tablename__ = "user_items"
     id = Column(Integer, primary_key=True, index=True)
@@ -275,6 +315,9 @@ class UserItem(Base):
     user = relationship("User", back_populates="items")
     item = relationship("Item")
 
+# One bag row per (user, item); add_user_item upserts on it
+Index("uq_user_items_user_item", UserItem.user_id, UserItem.item_id, unique=True)
+
 class UserFavorite(Base):
     __tablename__ = "user_favorites"
     id = Column(Integer, primary_key=True, index=True)
@@ -285,6 +328,9 @@ class UserFavorite(Base):
     user = relationship("User", back_populates="favorites")
     pokemon = relationship("Pokemon")
 
+# One favorite per (user, Pokemon); add_user_favorite inserts ON CONFLICT DO NOTHING
+Index("uq_user_favorites_user_pokemon", UserFavorite.user_id, UserFavorite.pokemon_id, unique=True)
+
 class UserSeen(Base):
     __tablename__ = "user_seen"
     id = Column(Integer, primary_key=True, index=True)
@@ -293,3 +339,6 @@ class UserSeen(Base):
     seen_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="seen")
+
+# One row per (user, Pokemon) seen; add_user_seen inserts ON CONFLICT DO NOTHING
+Index("uq_user_seen_user_pokemon", UserSeen.user_id, UserSeen.pokemon_id, unique=True)
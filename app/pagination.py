@@ -0,0 +1,25 @@
+import base64
+import json
+
+def encode_cursor(sort: str, descending: bool, value, last_id: int) -> str:
+    """
+    Build an opaque keyset cursor from the sort key and id of the last row on a page.
+    """
+    raw = json.dumps([sort, descending, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, descending: bool):
+    """
+    Return the (value, id) pair stored in a cursor.
+    Raises ValueError if the cursor is malformed or was issued for another ordering.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if not isinstance(last_id, int) or isinstance(value, (list, dict)):
+        raise ValueError("Malformed cursor")
+    if cursor_sort != sort or cursor_descending != descending:
+        raise ValueError("Cursor does not match the requested ordering")
+    return value, last_id
@@ -0,0 +1,131 @@
+"""
+In-process cache of authenticated users, keyed by token subject.
+
+get_current_user used to load the full users row on every authenticated
+request. Entries here are compact copies of the row that live for
+PRINCIPAL_CACHE_TTL_SECONDS in a bounded LRU. Writes to money, Elite Four
+progress or champion status mark the user's entry stale once committed:
+handlers that show those fields re-read the row, while handlers that only
+need the user's id keep using the entry. The TTL bounds how long another
+worker process can serve a stale entry.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+@dataclass(frozen=True)
+class Principal:
+    # Same fields as schemas.UserDisplay
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    money: int
+    elite_four_progress: int
+    is_champion: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active,
+            money=user.money,
+            elite_four_progress=user.elite_four_progress,
+            is_champion=user.is_champion,
+            created_at=user.created_at,
+        )
+
+class PrincipalCache:
+    def __init__(self, size: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # username -> (principal, expires_at, stale)
+        self._entries = OrderedDict()
+        self._usernames = {}
+        # user_id -> generation of its last invalidation, so a read that
+        # raced a write does not cache the old row as fresh
+        self._invalidated = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str, fresh: bool = True) -> Optional[Principal]:
+        """
+        The cached principal, or None. With fresh=False an entry marked stale
+        by a write is still returned (its id and username cannot change).
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                principal, expires_at, stale = entry
+                if expires_at <= time.monotonic():
+                    self._drop(username)
+                elif not (stale and fresh):
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    return principal
+            self.misses += 1
+            return None
+
+    def put(self, principal: Principal, generation: int):
+        """
+        Cache a principal read from the database. generation is self.generation
+        from before the read; the entry is stored stale if the user was
+        invalidated since.
+        """
+        with self._lock:
+            stale = self._invalidated.get(principal.id, -1) >= generation
+            self._entries[principal.username] = (principal, time.monotonic() + self.ttl, stale)
+            self._entries.move_to_end(principal.username)
+            self._usernames[principal.id] = principal.username
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, user_id: int):
+        """
+        Mark a user's entry stale. Call after committing a write to the row.
+        """
+        with self._lock:
+            self._invalidated[user_id] = self.generation
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.size:
+                self._invalidated.popitem(last=False)
+            self.generation += 1
+            username = self._usernames.get(user_id)
+            entry = self._entries.get(username)
+            if entry is not None:
+                self._entries[username] = (entry[0], entry[1], True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._usernames.clear()
+
+    def _drop(self, username: str):
+        principal, _, _ = self._entries.pop(username)
+        self._usernames.pop(principal.id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+cache = PrincipalCache()
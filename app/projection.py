@@ -0,0 +1,85 @@
+"""
+Sparse fieldsets for Pokemon payloads (`fields=` / `exclude=` query parameters).
+
+A projection is a frozenset of top-level Pokemon field names. It is used both to
+build a trimmed pydantic model (so serialization never touches unrequested
+attributes) and by crud to restrict the SQL select (see crud.pokemon_load_options).
+"""
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic import ConfigDict, create_model
+
+# Fields that are not part of the default payload but can be requested explicitly
+EXTRA_FIELDS = {
+    "front_sprite": (Optional[str], None),
+}
+
+PRESETS = {
+    "summary": ("id", "name", "types", "front_sprite"),
+}
+
+def _split(value: Optional[str]):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+def parse_projection(model, fields: Optional[str] = None, exclude: Optional[str] = None):
+    """
+    Resolve fields/exclude against model. Returns None when no projection was asked for.
+    Raises ValueError on unknown field names.
+    """
+    if not fields and not exclude:
+        return None
+
+    selected = set(model.model_fields)
+    if fields:
+        selected = set()
+        for name in _split(fields):
+            selected.update(PRESETS.get(name, (name,)))
+    excluded = set(_split(exclude))
+
+    unknown = (selected | excluded) - set(model.model_fields) - set(EXTRA_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    selected -= excluded
+    selected.add("id")
+    return frozenset(selected)
+
+@lru_cache(maxsize=256)
+def projected_model(model, selected: frozenset):
+    """
+    A from_attributes model containing only the selected fields of model.
+    """
+    definitions = {}
+    for name, field in model.model_fields.items():
+        if name in selected:
+            definitions[name] = (field.annotation, field)
+    for name, definition in EXTRA_FIELDS.items():
+        if name in selected:
+            definitions[name] = definition
+    return create_model(
+        f"{model.__name__}Projection",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+def nested_projection(outer_model, pokemon_model, selected: frozenset, field_name: str = "pokemon"):
+    """
+    outer_model with its nested Pokemon field trimmed to the selected fields.
+    """
+    return with_projected_pokemon(outer_model, field_name, projected_model(pokemon_model, selected))
+
+@lru_cache(maxsize=256)
+def with_projected_pokemon(outer_model, field_name: str, inner_model):
+    """
+    Subclass of outer_model whose nested Pokemon field uses inner_model instead.
+    List and Optional fields keep their shape.
+    """
+    field = outer_model.model_fields[field_name]
+    if getattr(field.annotation, "__origin__", None) is list:
+        definition = (List[inner_model], [])
+    elif field.is_required():
+        definition = (inner_model, ...)
+    else:
+        definition = (Optional[inner_model], None)
+    return create_model(f"{outer_model.__name__}Projection", __base__=outer_model, **{field_name: definition})
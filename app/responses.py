@@ -0,0 +1,91 @@
+"""
+Pre-encoded JSON responses for catalog endpoints.
+
+Catalog payloads only change when the catalog stamp changes, so the encoded
+bytes are cached per (route, validated parameters, stamp) with a strong ETag.
+Clients that send a matching If-None-Match get a bodyless 304. The cache is
+bounded both by entry count and by the total size of the cached bodies.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from .catalog import Catalog
+
+RESPONSE_CACHE_SIZE = int(os.getenv("CATALOG_RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_BYTES = int(os.getenv("CATALOG_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Bodies larger than this are encoded per request instead of cached
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("CATALOG_RESPONSE_CACHE_MAX_BODY_BYTES", str(RESPONSE_CACHE_BYTES // 8)))
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _encode(response_model, content):
+    adapter = _adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    return body, '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+def json_response(response_model, content) -> Response:
+    """
+    Encode content as response_model without caching (for per-user payloads).
+    """
+    body, _ = _encode(response_model, content)
+    return Response(content=body, media_type="application/json")
+
+def _store(key, entry):
+    global _cache_bytes
+    if len(entry[0]) > RESPONSE_CACHE_MAX_BODY_BYTES:
+        return
+    with _cache_lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= len(previous[0])
+        _cache[key] = entry
+        _cache_bytes += len(entry[0])
+        while len(_cache) > RESPONSE_CACHE_SIZE or _cache_bytes > RESPONSE_CACHE_BYTES:
+            _, (evicted, _) = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+def catalog_response(request: Request, catalog: Catalog, response_model, build, params=()) -> Response:
+    """
+    Serve build() encoded as response_model, reusing bytes from previous requests
+    for the same route, parameters and catalog stamp.
+
+    params must hold every validated value build() depends on (path parameters
+    included). Raw query strings are not part of the key, so unknown or
+    differently spelled parameters cannot create new cache entries.
+    """
+    key = (request.scope["route"].path, params, catalog.stamp)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+
+    if entry is None:
+        entry = _encode(response_model, build())
+        _store(key, entry)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
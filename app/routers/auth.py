@@ -1,33 +1,60 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from .. import crud, schemas, auth, dependencies
+from ..catalog import Catalog, get_catalog
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"],
 )
 
+# bcrypt runs on the hashing pool, so these handlers never block the event loop
+HASHER_BUSY = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many sign-ins in progress, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
 @router.post("/signup", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(dependencies.get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(dependencies.get_db), catalog: Catalog = Depends(get_catalog)):
+    db_user = await crud.get_user_by_username_or_email(db, username=user.username, email=user.email)
+    if db_user and db_user.email == user.email:
         raise HTTPException(status_code=400, detail="Email already registered")
-    db_user = crud.get_user_by_username(db, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already taken")
-    return crud.create_user(db=db, user=user)
+    try:
+        hashed_password = await auth.get_password_hash_async(user.password)
+    except auth.PasswordHasherBusy:
+        raise HASHER_BUSY
+    db_user = await crud.create_user(db=db, user=user, catalog=catalog, hashed_password=hashed_password)
+    if db_user is None:
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    return db_user
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(dependencies.get_db)):
-    user = crud.get_user_by_username(db, username=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(dependencies.get_db)):
+    user = await crud.get_user_by_username(db, username=form_data.username)
+    try:
+        verified = user is not None and await auth.verify_password_async(form_data.password, user.hashed_password)
+    except auth.PasswordHasherBusy:
+        raise HASHER_BUSY
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Upgrade hashes made with an older cost factor while we have the password
+    if auth.needs_rehash(user.hashed_password):
+        try:
+            hashed_password = await auth.get_password_hash_async(form_data.password)
+            await crud.update_user_password_hash(db, user.id, hashed_password)
+        except auth.PasswordHasherBusy:
+            pass
+
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from .. import crud, schemas, dependencies
+from fastapi import APIRouter, Depends, Request
+from .. import schemas
+from ..catalog import Catalog, get_catalog
+from ..responses import catalog_response
 from typing import List
 
 router = APIRouter(
@@ -9,5 +10,5 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.BerryBase])
-def read_berries(db: Session = Depends(dependencies.get_db)):
-    return crud.get_berries(db)
+def read_berries(request: Request, catalog: Catalog = Depends(get_catalog)):
+    return catalog_response(request, catalog, List[schemas.BerryBase], lambda: catalog.berry_list)
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-import random
-from .. import crud, schemas, models, dependencies
-from ..game_logic import calculate_xp_for_level
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Union
+from .. import crud, schemas, dependencies, projection, battle, encounters
+from ..principals import Principal
+from ..catalog import Catalog, get_catalog
+from ..responses import json_response
 
 router = APIRouter(
     prefix="/game",
@@ -11,30 +13,20 @@ router = APIRouter(
 )
 
 @router.post("/catch", response_model=schemas.UserPokemon)
-def catch_pokemon(pokemon_data: schemas.UserPokemonCreate, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def catch_pokemon(pokemon_data: schemas.UserPokemonCreate, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal), catalog: Catalog = Depends(get_catalog)):
     try:
         # Verify pokemon exists
-        pokemon = crud.get_pokemon(db, pokemon_id=pokemon_data.pokemon_id)
-        if not pokemon:
+        if pokemon_data.pokemon_id not in catalog.pokemon:
             raise HTTPException(status_code=404, detail="Pokemon not found")
         
-        # Find Poke Ball (ID can vary, so look it up)
-        poke_ball = db.query(models.Item).filter(models.Item.name.ilike("%poke%ball%")).first()
-        if not poke_ball:
-            # Fallback to ID 1 if search fails, though lookup is safer
-            poke_ball_id = 1
-        else:
-            poke_ball_id = poke_ball.id
+        # Poke Ball id is resolved once per catalog load (ID can vary between seeds)
+        poke_ball_id = catalog.poke_ball_id if catalog.poke_ball_id is not None else 1
             
-        if not crud.remove_user_item(db, user_id=current_user.id, item_id=poke_ball_id, quantity=1):
+        if not await crud.remove_user_item(db, user_id=current_user.id, item_id=poke_ball_id, quantity=1):
             raise HTTPException(status_code=400, detail="No Poke Balls left!")
         
         
-        user_pokemon = crud.add_user_pokemon(db=db, user_id=current_user.id, pokemon_id=pokemon_data.pokemon_id, nickname=pokemon_data.nickname)
-        
-        # Calculate next level XP
-        growth_rate = pokemon.species.growth_rate.name if pokemon.species and pokemon.species.growth_rate else "medium-fast"
-        user_pokemon.next_level_xp = calculate_xp_for_level(growth_rate, user_pokemon.level + 1)
+        user_pokemon = await crud.add_user_pokemon(db=db, user_id=current_user.id, pokemon_id=pokemon_data.pokemon_id, catalog=catalog, nickname=pokemon_data.nickname)
         
         return user_pokemon
     except HTTPException:
@@ -43,74 +35,131 @@ def catch_pokemon(pokemon_data: schemas.UserPokemonCreate, db: Session = Depends
         print(f"Error in catch_pokemon: {e}")
         raise HTTPException(status_code=500, detail="Failed to catch Pokemon. Please try again.")
 
+def _user_pokemon_response(user_pokemons, selected):
+    if selected is None:
+        return user_pokemons
+    model = projection.nested_projection(schemas.UserPokemon, schemas.PokemonBase, selected)
+    return json_response(List[model], user_pokemons)
+
 @router.get("/my-pokemon", response_model=List[schemas.UserPokemon])
-def read_my_pokemon(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    user_pokemons = crud.get_user_pokemons(db, user_id=current_user.id)
-    
-    # Enrich with XP data
-    for up in user_pokemons:
-        growth_rate = "medium-fast"
-        if up.pokemon and up.pokemon.species and up.pokemon.species.growth_rate:
-            growth_rate = up.pokemon.species.growth_rate.name
-        up.next_level_xp = calculate_xp_for_level(growth_rate, up.level + 1)
-        
-    return user_pokemons
+async def read_my_pokemon(selected=Depends(dependencies.get_pokemon_projection), db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    user_pokemons = await crud.get_user_pokemons(db, user_id=current_user.id, fields=selected)
+
+    return _user_pokemon_response(user_pokemons, selected)
 
 @router.post("/battle", response_model=schemas.BattleHistory)
-def record_battle(battle_data: schemas.BattleHistoryCreate, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    return crud.add_battle_history(db=db, user_id=current_user.id, battle=battle_data)
+async def record_battle(battle_data: schemas.BattleHistoryCreate, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    return await crud.add_battle_history(db=db, user_id=current_user.id, battle=battle_data)
+
+MAX_SIMULATED_BATTLES = 100000
+
+@router.post("/battle/simulate", response_model=schemas.BattleSimulation)
+async def simulate_battle(request: schemas.BattleSimulationRequest, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal), catalog: Catalog = Depends(get_catalog)):
+    if request.battles < 1 or request.battles > MAX_SIMULATED_BATTLES:
+        raise HTTPException(status_code=400, detail=f"battles must be between 1 and {MAX_SIMULATED_BATTLES}")
+
+    if request.opponent == "gym":
+        opponent = battle.gym_opponent(catalog, request.opponent_id)
+    elif request.opponent == "elite-four":
+        opponent = battle.elite_four_opponent(catalog, request.opponent_id)
+    else:
+        raise HTTPException(status_code=400, detail="opponent must be 'gym' or 'elite-four'")
+    if opponent is None:
+        raise HTTPException(status_code=404, detail="Opponent not found")
+    opponent_name, opponent_team = opponent
+
+    party = battle.party_combatants(catalog, await crud.get_user_party(db, user_id=current_user.id, fields=frozenset({"id"})))
+    if not party:
+        raise HTTPException(status_code=400, detail="Your party is empty")
+    if not opponent_team:
+        raise HTTPException(status_code=404, detail="Opponent has no Pokemon")
+
+    # CPU-bound; keep it off the event loop
+    result = await run_in_threadpool(battle.simulate, party, opponent_team, catalog.type_chart, request.battles, seed=request.seed)
+    return {
+        "opponent_name": opponent_name,
+        "opponent_team": opponent_team,
+        "party": party,
+        **result,
+    }
 
 @router.get("/party", response_model=List[schemas.UserPokemon])
-def get_party(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    party = crud.get_user_party(db, user_id=current_user.id)
-    
-    # Enrich with XP data
+async def get_party(selected=Depends(dependencies.get_pokemon_projection), db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    party = await crud.get_user_party(db, user_id=current_user.id, fields=selected)
+
+    return _user_pokemon_response(party, selected)
+
+@router.get("/party/matchups", response_model=schemas.PartyMatchups)
+async def get_party_matchups(db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal), catalog: Catalog = Depends(get_catalog)):
+    party = await crud.get_user_party(db, user_id=current_user.id, fields=frozenset({"id"}))
+    chart = catalog.type_chart
+
+    team_types = []
     for up in party:
-        growth_rate = "medium-fast"
-        if up.pokemon and up.pokemon.species and up.pokemon.species.growth_rate:
-            growth_rate = up.pokemon.species.growth_rate.name
-        up.next_level_xp = calculate_xp_for_level(growth_rate, up.level + 1)
-        
-    return party
+        pokemon = catalog.pokemon.get(up.pokemon_id)
+        team_types.append([t.name for t in pokemon.types] if pokemon else [])
+
+    # Whole party at once: (members, attacking types) and (members, defending types)
+    defense = chart.defensive(team_types)
+    best_offense, _ = chart.offensive(team_types)
+
+    members = []
+    for up, types, vector in zip(party, team_types, defense):
+        pokemon = catalog.pokemon.get(up.pokemon_id)
+        members.append({
+            "user_pokemon_id": up.id,
+            "pokemon_id": up.pokemon_id,
+            "name": up.nickname or (pokemon.name if pokemon else str(up.pokemon_id)),
+            "types": types,
+            **chart.defense_summary(vector),
+        })
+    coverage = chart.as_dict(best_offense)
+    return {
+        "members": members,
+        "weak_members": chart.as_dict((defense > 1).sum(axis=0)),
+        "resistant_members": chart.as_dict((defense < 1).sum(axis=0)),
+        "offensive_coverage": coverage,
+        "uncovered": [name for name, m in coverage.items() if m <= 1],
+    }
 
 @router.post("/party/set", response_model=schemas.UserPokemon)
-def set_party_status(update_request: schemas.PartyUpdateRequest, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    user_pokemon = crud.get_user_pokemon(db, user_pokemon_id=update_request.user_pokemon_id)
+async def set_party_status(update_request: schemas.PartyUpdateRequest, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    user_pokemon = await crud.get_user_pokemon(db, user_pokemon_id=update_request.user_pokemon_id)
     if not user_pokemon or user_pokemon.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Pokemon not found in your collection")
     
     # Check party limit if adding
     if update_request.is_in_party:
-        current_party = crud.get_user_party(db, user_id=current_user.id)
-        if len(current_party) >= 6:
+        if await crud.count_user_party(db, user_id=current_user.id) >= 6:
             raise HTTPException(status_code=400, detail="Party is full (max 6)")
             
-    return crud.update_party_status(db, user_pokemon, update_request.is_in_party)
-
-@router.get("/encounter", response_model=schemas.Pokemon)
-def wild_encounter(db: Session = Depends(dependencies.get_db)):
-    # Simple random encounter logic
-    # In a real app, this would be based on location/rarity
-    # Get total count (approx) or pick random ID
-    # Since IDs are 1-1010, pick random
-    random_id = random.randint(1, 151) # Stick to Gen 1 for safety if scraper incomplete
-    pokemon = crud.get_pokemon(db, pokemon_id=random_id)
-    if not pokemon:
-        # Fallback
-        pokemon = crud.get_pokemon(db, pokemon_id=1)
-        
-    return pokemon
+    return await crud.update_party_status(db, user_pokemon, update_request.is_in_party)
 
-@router.post("/pokemon/{user_pokemon_id}/xp", response_model=schemas.UserPokemon)
-def gain_xp(user_pokemon_id: int, xp_data: schemas.XPUpdate, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    user_pokemon = crud.get_user_pokemon(db, user_pokemon_id=user_pokemon_id)
+MAX_ENCOUNTERS = 100
+
+@router.get("/encounter", response_model=Union[schemas.Pokemon, List[schemas.Pokemon]])
+def wild_encounter(count: Optional[int] = None, pool: str = encounters.DEFAULT_POOL, catalog: Catalog = Depends(get_catalog)):
+    """
+    Weighted random wild Pokemon from a pool ("all", a generation id or name).
+    Returns one Pokemon, or a list when count is given.
+    """
+    if count is not None and (count < 1 or count > MAX_ENCOUNTERS):
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_ENCOUNTERS}")
+
+    drawn = catalog.encounters.draw(pool, count or 1)
+    if drawn is None:
+        raise HTTPException(status_code=404, detail="Encounter pool not found")
+    if not drawn:
+        raise HTTPException(status_code=404, detail="No Pokemon to encounter")
+
+    if count is None:
+        return json_response(schemas.Pokemon, drawn[0])
+    return json_response(List[schemas.Pokemon], drawn)
+
+@router.post("/pokemon/{user_pokemon_id}/xp", response_model=schemas.UserPokemonLevelUp)
+async def gain_xp(user_pokemon_id: int, xp_data: schemas.XPUpdate, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal), catalog: Catalog = Depends(get_catalog)):
+    user_pokemon = await crud.get_user_pokemon(db, user_pokemon_id=user_pokemon_id)
     if not user_pokemon or user_pokemon.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Pokemon not found")
         
-    updated_pokemon = crud.add_xp(db, user_pokemon_id, xp_data.xp_amount)
-    
-    # Enrich with next level XP for frontend
-    growth_rate = updated_pokemon.pokemon.growth_rate or "medium-fast"
-    updated_pokemon.next_level_xp = calculate_xp_for_level(growth_rate, updated_pokemon.level + 1)
-    
-    return updated_pokemon
+    return await crud.add_xp(db, user_pokemon, xp_data.xp_amount, catalog)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from .. import auth, principals, database, dependencies
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(dependencies.require_metrics_token)],
+    include_in_schema=False,
+)
+
+@router.get("/password-hashing")
+def read_password_hashing_metrics():
+    return auth.password_hasher.stats()
+
+@router.get("/principal-cache")
+def read_principal_cache_metrics():
+    return principals.cache.stats()
+
+@router.get("/db-pool")
+def read_db_pool_metrics():
+    return database.pool_stats()
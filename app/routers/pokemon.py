@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, models, schemas
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Literal, Optional, Union
+from .. import schemas, pagination, projection, search, autocomplete
+from ..catalog import Catalog, get_catalog
+from ..responses import catalog_response, json_response
+
+MAX_BATCH_IDS = 1000
+MAX_PAGE_SIZE = 1000
 
 router = APIRouter(
     prefix="/pokemon",
@@ -10,14 +13,236 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.get("/", response_model=List[schemas.Pokemon])
-def read_pokemons(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    pokemons = crud.get_pokemons(db, skip=skip, limit=limit)
-    return pokemons
+def _pokemon_model(fields: Optional[str], exclude: Optional[str]):
+    try:
+        selected = projection.parse_projection(schemas.Pokemon, fields, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selected is None:
+        return schemas.Pokemon, None
+    return projection.projected_model(schemas.Pokemon, selected), selected
+
+@router.get("/", response_model=Union[List[schemas.Pokemon], schemas.PokemonPage])
+def read_pokemons(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0),
+    sort: Literal["order", "id", "name", "base_experience"] = "order",
+    descending: bool = False,
+    paginate: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    catalog: Catalog = Depends(get_catalog),
+):
+    item_model, selected = _pokemon_model(fields, exclude)
+
+    # Offset mode is kept for existing clients (including ones that fetch the whole
+    # Pokedex in one call, so limit is only capped at the catalog size there);
+    # passing a cursor implies cursor mode
+    if paginate == "offset" and cursor is None:
+        skip, limit = min(skip, len(catalog.pokemon)), min(limit, len(catalog.pokemon))
+        return catalog_response(
+            request, catalog, List[item_model],
+            lambda: catalog.pokemon_slice(sort=sort, descending=descending, skip=skip, limit=limit),
+            params=("offset", sort, descending, skip, limit, selected),
+        )
+
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_PAGE_SIZE} in cursor mode")
+    try:
+        after = pagination.decode_cursor(cursor, sort, descending) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def build_page():
+        try:
+            pokemons, last_position = catalog.pokemon_page(sort=sort, descending=descending, after=after, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        next_cursor = pagination.encode_cursor(sort, descending, *last_position) if last_position else None
+        return {"items": pokemons, "next_cursor": next_cursor}
+
+    page_model = schemas.PokemonPage
+    if selected is not None:
+        page_model = projection.with_projected_pokemon(schemas.PokemonPage, "items", item_model)
+    return catalog_response(
+        request, catalog, page_model, build_page,
+        params=("cursor", sort, descending, after, limit, selected),
+    )
+
+@router.get("/search", response_model=schemas.PokemonSearchResult)
+def search_pokemon(
+    request: Request,
+    type: List[str] = Query([]),
+    ability: List[str] = Query([]),
+    generation: Optional[str] = None,
+    egg_group: Optional[str] = None,
+    is_baby: Optional[bool] = None,
+    name: Optional[str] = None,
+    min_hp: Optional[int] = None,
+    max_hp: Optional[int] = None,
+    min_attack: Optional[int] = None,
+    max_attack: Optional[int] = None,
+    min_defense: Optional[int] = None,
+    max_defense: Optional[int] = None,
+    min_special_attack: Optional[int] = None,
+    max_special_attack: Optional[int] = None,
+    min_special_defense: Optional[int] = None,
+    max_special_defense: Optional[int] = None,
+    min_speed: Optional[int] = None,
+    max_speed: Optional[int] = None,
+    min_total: Optional[int] = None,
+    max_total: Optional[int] = None,
+    sort: Literal[search.SORT_KEYS] = "id",
+    descending: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    catalog: Catalog = Depends(get_catalog),
+):
+    """
+    Filter the Pokedex. Repeated type/ability parameters must all match;
+    generation accepts a name (generation-i) or an id; stat bounds are inclusive.
+    """
+    item_model, selected = _pokemon_model(fields, exclude)
+    stat_ranges = {
+        "hp": (min_hp, max_hp),
+        "attack": (min_attack, max_attack),
+        "defense": (min_defense, max_defense),
+        "special-attack": (min_special_attack, max_special_attack),
+        "special-defense": (min_special_defense, max_special_defense),
+        "speed": (min_speed, max_speed),
+        "total": (min_total, max_total),
+    }
+
+    def build():
+        ids = catalog.search_index.search(
+            types=type, abilities=ability, generation=generation, egg_group=egg_group, is_baby=is_baby,
+            stat_ranges=stat_ranges, name_prefix=name.lower() if name else None, sort=sort, descending=descending,
+        )
+        return {"total": len(ids), "items": [catalog.pokemon[i] for i in ids[skip:skip + limit]]}
+
+    result_model = schemas.PokemonSearchResult
+    if selected is not None:
+        result_model = projection.with_projected_pokemon(schemas.PokemonSearchResult, "items", item_model)
+    params = (
+        tuple(sorted(set(type))), tuple(sorted(set(ability))), generation, egg_group, is_baby,
+        name.lower() if name else None, tuple(stat_ranges.items()), sort, descending, skip, limit, selected,
+    )
+    return catalog_response(request, catalog, result_model, build, params=params)
+
+@router.get("/autocomplete", response_model=List[schemas.AutocompleteEntry])
+def autocomplete_names(
+    request: Request,
+    q: str,
+    limit: int = Query(10, ge=1, le=autocomplete.MAX_RESULTS),
+    max_distance: Optional[int] = Query(None, ge=0, le=2),
+    kind: List[Literal["pokemon", "species", "move", "item", "ability"]] = Query([]),
+    catalog: Catalog = Depends(get_catalog),
+):
+    """
+    Names starting with q (within a few typos for longer queries) across the catalog.
+    """
+    def build():
+        matches = catalog.name_index.complete(q, limit=limit, max_distance=max_distance, kinds=set(kind))
+        return [{"kind": e.kind, "id": e.id, "name": e.name, "distance": d} for e, d in matches]
+
+    return catalog_response(
+        request, catalog, List[schemas.AutocompleteEntry], build,
+        params=(q, limit, max_distance, tuple(sorted(set(kind)))),
+    )
+
+def _batch_model(item_model):
+    if item_model is schemas.Pokemon:
+        return schemas.PokemonBatch
+    return projection.with_projected_pokemon(schemas.PokemonBatch, "items", item_model)
+
+def _batch(catalog: Catalog, ids: List[int]):
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    items, missing = catalog.pokemon_batch(ids)
+    return {"items": items, "missing": missing}
+
+@router.get("/batch", response_model=schemas.PokemonBatch)
+def read_pokemon_batch(
+    request: Request,
+    ids: str,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    catalog: Catalog = Depends(get_catalog),
+):
+    item_model, selected = _pokemon_model(fields, exclude)
+    try:
+        pokemon_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma separated list of integers")
+    return catalog_response(
+        request, catalog, _batch_model(item_model), lambda: _batch(catalog, pokemon_ids),
+        params=(tuple(pokemon_ids), selected),
+    )
+
+@router.post("/batch", response_model=schemas.PokemonBatch)
+def post_pokemon_batch(
+    batch: schemas.PokemonBatchRequest,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    catalog: Catalog = Depends(get_catalog),
+):
+    item_model, _ = _pokemon_model(fields, exclude)
+    return json_response(_batch_model(item_model), _batch(catalog, batch.ids))
 
 @router.get("/{pokemon_id}", response_model=schemas.Pokemon)
-def read_pokemon(pokemon_id: int, db: Session = Depends(get_db)):
-    db_pokemon = crud.get_pokemon(db, pokemon_id=pokemon_id)
-    if db_pokemon is None:
+def read_pokemon(
+    pokemon_id: int,
+    request: Request,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    catalog: Catalog = Depends(get_catalog),
+):
+    item_model, selected = _pokemon_model(fields, exclude)
+    pokemon = catalog.pokemon.get(pokemon_id)
+    if pokemon is None:
         raise HTTPException(status_code=404, detail="Pokemon not found")
-    return db_pokemon
+    return catalog_response(request, catalog, item_model, lambda: pokemon, params=(pokemon_id, selected))
+
+@router.get("/{pokemon_id}/moves", response_model=List[schemas.LearnedMove])
+def read_pokemon_moves(
+    pokemon_id: int,
+    request: Request,
+    method: Optional[str] = None,
+    min_level: Optional[int] = None,
+    max_level: Optional[int] = None,
+    catalog: Catalog = Depends(get_catalog),
+):
+    """
+    Learnset of a Pokemon. Level bounds only apply to level-up moves.
+    """
+    if pokemon_id not in catalog.pokemon:
+        raise HTTPException(status_code=404, detail="Pokemon not found")
+
+    def build():
+        learned = catalog.learnsets.moves(pokemon_id, method=method, min_level=min_level, max_level=max_level)
+        return [
+            {"move": catalog.moves[move_id], "learn_method": learn_method, "level": level}
+            for move_id, learn_method, level in learned
+        ]
+
+    return catalog_response(
+        request, catalog, List[schemas.LearnedMove], build,
+        params=(pokemon_id, method, min_level, max_level),
+    )
+
+@router.get("/{pokemon_id}/weaknesses", response_model=schemas.PokemonWeaknesses)
+def read_pokemon_weaknesses(pokemon_id: int, request: Request, catalog: Catalog = Depends(get_catalog)):
+    pokemon = catalog.pokemon.get(pokemon_id)
+    if pokemon is None:
+        raise HTTPException(status_code=404, detail="Pokemon not found")
+
+    def build():
+        types = [t.name for t in pokemon.types]
+        vector = catalog.type_chart.defensive([types])[0]
+        return {"pokemon_id": pokemon_id, "types": types, **catalog.type_chart.defense_summary(vector)}
+
+    return catalog_response(request, catalog, schemas.PokemonWeaknesses, build, params=(pokemon_id,))
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from .. import crud, schemas, models, dependencies
+from .. import crud, schemas, dependencies
+from ..principals import Principal
+from ..catalog import Catalog, get_catalog
+from ..responses import catalog_response
 
 router = APIRouter(
     prefix="/shop",
@@ -9,22 +12,25 @@ router = APIRouter(
 )
 
 @router.get("/items", response_model=List[schemas.Item])
-def read_items(db: Session = Depends(dependencies.get_db)):
-    return crud.get_items(db)
+def read_items(request: Request, catalog: Catalog = Depends(get_catalog)):
+    return catalog_response(request, catalog, List[schemas.Item], lambda: catalog.item_list)
 
 @router.post("/buy", response_model=schemas.UserItem)
-def buy_item(buy_request: schemas.BuyItemRequest, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    item = crud.get_item(db, item_id=buy_request.item_id)
+async def buy_item(buy_request: schemas.BuyItemRequest, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal), catalog: Catalog = Depends(get_catalog)):
+    item = catalog.items.get(buy_request.item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    total_cost = item.cost * buy_request.quantity
+    if buy_request.quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+    total_cost = (item.cost or 0) * buy_request.quantity
     
-    if not crud.deduct_money(db, user_id=current_user.id, amount=total_cost):
+    user_item = await crud.purchase_item(db, user_id=current_user.id, item_id=buy_request.item_id, quantity=buy_request.quantity, cost=total_cost)
+    if user_item is None:
         raise HTTPException(status_code=400, detail="You do not have enough money for this purchase.")
         
-    return crud.add_user_item(db=db, user_id=current_user.id, item_id=buy_request.item_id, quantity=buy_request.quantity)
+    return user_item
 
 @router.get("/bag", response_model=List[schemas.UserItem])
-def read_bag(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    return crud.get_user_items(db, user_id=current_user.id)
+async def read_bag(db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    return await crud.get_user_items(db, user_id=current_user.id)
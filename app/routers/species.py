@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from .. import schemas
+from ..catalog import Catalog, get_catalog
+from ..responses import catalog_response
+
+router = APIRouter(
+    prefix="/species",
+    tags=["species"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/{species_id}/evolution-chain", response_model=schemas.EvolutionChain)
+def read_evolution_chain(species_id: int, request: Request, catalog: Catalog = Depends(get_catalog)):
+    chain = catalog.evolutions.chain(species_id)
+    if chain is None:
+        raise HTTPException(status_code=404, detail="Species not found")
+    return catalog_response(request, catalog, schemas.EvolutionChain, lambda: chain, params=(species_id,))
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from .. import schemas, models, dependencies
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas, dependencies, projection
+from ..principals import Principal
+from ..responses import json_response
 
 router = APIRouter(
     prefix="/users",
@@ -8,36 +10,40 @@ router = APIRouter(
 )
 
 @router.get("/me", response_model=schemas.User)
-async def read_users_me(current_user: models.User = Depends(dependencies.get_current_user)):
+async def read_users_me(current_user: Principal = Depends(dependencies.get_current_user)):
     return current_user
 
 @router.get("/favorites", response_model=list[schemas.UserFavorite])
-def read_favorites(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def read_favorites(selected=Depends(dependencies.get_pokemon_projection), db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     from .. import crud
-    return crud.get_user_favorites(db, user_id=current_user.id)
+    favorites = await crud.get_user_favorites(db, user_id=current_user.id, fields=selected)
+    if selected is None:
+        return favorites
+    model = projection.nested_projection(schemas.UserFavorite, schemas.PokemonBase, selected)
+    return json_response(list[model], favorites)
 
 @router.post("/favorites", response_model=schemas.UserFavorite)
-def add_favorite(favorite: schemas.UserFavoriteCreate, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def add_favorite(favorite: schemas.UserFavoriteCreate, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     from .. import crud
-    return crud.add_user_favorite(db, user_id=current_user.id, pokemon_id=favorite.pokemon_id)
+    return await crud.add_user_favorite(db, user_id=current_user.id, pokemon_id=favorite.pokemon_id)
 
 @router.delete("/favorites/{pokemon_id}")
-def remove_favorite(pokemon_id: int, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def remove_favorite(pokemon_id: int, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     from .. import crud
-    success = crud.remove_user_favorite(db, user_id=current_user.id, pokemon_id=pokemon_id)
+    success = await crud.remove_user_favorite(db, user_id=current_user.id, pokemon_id=pokemon_id)
     return {"success": success}
 
 @router.get("/stats")
-def get_stats(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def get_stats(db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     from .. import crud
-    return crud.get_user_stats(db, user_id=current_user.id)
+    return await crud.get_user_stats(db, user_id=current_user.id)
 
 @router.get("/seen", response_model=list[int])
-def read_seen(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def read_seen(db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     from .. import crud
-    return crud.get_user_seen_ids(db, user_id=current_user.id)
+    return await crud.get_user_seen_ids(db, user_id=current_user.id)
 
 @router.post("/seen/{pokemon_id}")
-def add_seen(pokemon_id: int, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def add_seen(pokemon_id: int, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     from .. import crud
-    return crud.add_user_seen(db, user_id=current_user.id, pokemon_id=pokemon_id)
+    return await crud.add_user_seen(db, user_id=current_user.id, pokemon_id=pokemon_id)
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from .. import crud, schemas, models, dependencies
+from .. import crud, schemas, dependencies
+from ..principals import Principal
+from ..catalog import Catalog, get_catalog
+from ..responses import catalog_response
 
 router = APIRouter(
     prefix="/world",
@@ -9,31 +12,31 @@ router = APIRouter(
 )
 
 @router.get("/gyms", response_model=List[schemas.Gym])
-def read_gyms(db: Session = Depends(dependencies.get_db)):
-    return crud.get_gyms(db)
+def read_gyms(request: Request, catalog: Catalog = Depends(get_catalog)):
+    return catalog_response(request, catalog, List[schemas.Gym], lambda: catalog.gym_list)
 
 @router.get("/elite-four", response_model=List[schemas.EliteFourMember])
-def read_elite_four(db: Session = Depends(dependencies.get_db)):
-    return crud.get_elite_four(db)
+def read_elite_four(request: Request, catalog: Catalog = Depends(get_catalog)):
+    return catalog_response(request, catalog, List[schemas.EliteFourMember], lambda: catalog.elite_four_list)
 
 @router.post("/gyms/{gym_id}/challenge", response_model=schemas.UserBadge)
-def challenge_gym(gym_id: int, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    gym = crud.get_gym(db, gym_id=gym_id)
+async def challenge_gym(gym_id: int, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal), catalog: Catalog = Depends(get_catalog)):
+    gym = catalog.gyms.get(gym_id)
     if not gym:
         raise HTTPException(status_code=404, detail="Gym not found")
     
-    return crud.add_user_badge(db=db, user_id=current_user.id, gym_id=gym_id)
+    return await crud.add_user_badge(db=db, user_id=current_user.id, gym_id=gym_id)
 
 @router.get("/my-badges", response_model=List[schemas.UserBadge])
-def read_my_badges(db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    return crud.get_user_badges(db, user_id=current_user.id)
+async def read_my_badges(db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    return await crud.get_user_badges(db, user_id=current_user.id)
 
 @router.post("/elite-four/progress")
-def update_ef_progress(progress: int, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
+async def update_ef_progress(progress: int, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
     if progress < 0 or progress > 4:
         raise HTTPException(status_code=400, detail="Invalid progress")
-    return crud.update_elite_four_progress(db, user_id=current_user.id, progress=progress)
+    return await crud.update_elite_four_progress(db, user_id=current_user.id, progress=progress)
 
 @router.post("/elite-four/champion")
-def make_champion(is_champion: bool = True, db: Session = Depends(dependencies.get_db), current_user: models.User = Depends(dependencies.get_current_user)):
-    return crud.set_champion(db, user_id=current_user.id, is_champion=is_champion)
+async def make_champion(is_champion: bool = True, db: AsyncSession = Depends(dependencies.get_db), current_user: Principal = Depends(dependencies.get_principal)):
+    return await crud.set_champion(db, user_id=current_user.id, is_champion=is_champion)
@@ -66,6 +66,8 @@ class PokemonSpeciesBase(BaseModel):
     capture_rate: Optional[int] = None
     base_happiness: Optional[int] = None
     is_baby: Optional[bool] = False
+    is_legendary: Optional[bool] = False
+    is_mythical: Optional[bool] = False
     growth_rate: Optional[GrowthRateBase] = None
     evolution_level: Optional[int] = None
     evolution_species_id: Optional[int] = None
@@ -73,6 +75,25 @@ class PokemonSpeciesBase(BaseModel):
     class Config:
         from_attributes = True
 
+class EvolutionTrigger(BaseModel):
+    trigger: Optional[str] = None
+    min_level: Optional[int] = None
+    item_name: Optional[str] = None
+
+class EvolutionNode(BaseModel):
+    species_id: int
+    name: str
+    depth: int
+    triggers: List[EvolutionTrigger] = []
+    evolves_to: List["EvolutionNode"] = []
+
+class EvolutionChain(BaseModel):
+    species_id: int
+    root_species_id: int
+    ancestors: List[int] = []
+    descendants: List[int] = []
+    chain: EvolutionNode
+
 class MoveBase(BaseModel):
     id: int
     name: str
@@ -85,6 +106,11 @@ class MoveBase(BaseModel):
     class Config:
         from_attributes = True
 
+class LearnedMove(BaseModel):
+    move: MoveBase
+    learn_method: str
+    level: Optional[int] = None
+
 class PokemonBase(BaseModel):
     id: int
     name: str
@@ -106,6 +132,37 @@ class PokemonCreate(PokemonBase):
 class PokemonDetail(PokemonBase):
     moves_learned: List[MoveBase] = []
 
+class PokemonPage(BaseModel):
+    items: List[PokemonDetail] = []
+    next_cursor: Optional[str] = None
+
+class PokemonSearchResult(BaseModel):
+    total: int
+    items: List[PokemonDetail] = []
+
+class AutocompleteEntry(BaseModel):
+    kind: str
+    id: int
+    name: str
+    distance: int = 0
+
+class TypeMatchup(BaseModel):
+    multipliers: Dict[str, float] = {}
+    weaknesses: List[str] = []
+    resistances: List[str] = []
+    immunities: List[str] = []
+
+class PokemonWeaknesses(TypeMatchup):
+    pokemon_id: int
+    types: List[str] = []
+
+class PokemonBatchRequest(BaseModel):
+    ids: List[int]
+
+class PokemonBatch(BaseModel):
+    items: List[PokemonDetail] = []
+    missing: List[int] = []
+
 # --- World Models ---
 class GymBase(BaseModel):
     name: str
@@ -183,7 +240,7 @@ class UserPokemonDisplay(BaseModel):
     nickname: Optional[str] = None
     level: int
     experience: int
-    next_level_xp: Optional[int] = 0 # Computed field
+    next_level_xp: Optional[int] = 0
     current_hp: int
     max_hp: int
     attack: int
@@ -199,6 +256,31 @@ class UserPokemonDisplay(BaseModel):
     class Config:
         from_attributes = True
 
+class LevelUpEvolution(BaseModel):
+    level: int
+    from_pokemon_id: int
+    from_name: str
+    to_pokemon_id: int
+    to_name: str
+
+class UserPokemonLevelUp(UserPokemonDisplay):
+    levels_gained: int = 0
+    evolutions: List[LevelUpEvolution] = []
+    new_moves: List[LearnedMove] = [] # level-up moves unlocked by this XP grant
+
+class PartyMemberMatchup(TypeMatchup):
+    user_pokemon_id: int
+    pokemon_id: int
+    name: str
+    types: List[str] = []
+
+class PartyMatchups(BaseModel):
+    members: List[PartyMemberMatchup] = []
+    weak_members: Dict[str, int] = {} # attacking type -> members taking > 1x
+    resistant_members: Dict[str, int] = {} # attacking type -> members taking < 1x
+    offensive_coverage: Dict[str, float] = {} # defending type -> best STAB multiplier
+    uncovered: List[str] = [] # defending types nobody hits super effectively
+
 class UserPokemonCreate(BaseModel):
     pokemon_id: int
     nickname: Optional[str] = None
@@ -218,6 +300,27 @@ class BattleHistory(BattleHistoryBase):
     class Config:
         from_attributes = True
 
+class BattleSimulationRequest(BaseModel):
+    opponent: str # "gym" or "elite-four"
+    opponent_id: int
+    battles: int = 1000
+    seed: Optional[int] = None
+
+class SimulatedPokemon(BaseModel):
+    pokemon_id: int
+    name: str
+    level: int
+
+class BattleSimulation(BaseModel):
+    opponent_name: str
+    opponent_team: List[SimulatedPokemon] = []
+    party: List[SimulatedPokemon] = []
+    battles: int
+    wins: int
+    unfinished: int # hit the turn limit, counted as not won
+    win_probability: float
+    expected_turns: float
+
 class PartyUpdateRequest(BaseModel):
     user_pokemon_id: int
     is_in_party: bool
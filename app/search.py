@@ -0,0 +1,115 @@
+"""
+Precomputed search indexes over the catalog snapshot.
+
+Built once per catalog load: inverted indexes (type, ability, generation, egg
+group, baby) map a key to a frozenset of Pokemon ids, and every base stat plus
+the stat total has a sorted (value, id) array answering range filters with
+bisect. A query intersects the candidate sets smallest-first, so its cost
+depends on the result size rather than on the catalog size.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+SORT_KEYS = ("id", "name", "order", "total") + STAT_NAMES
+
+def _stat(pokemon, name):
+    return (pokemon.stats or {}).get(name, 0)
+
+def _total(pokemon):
+    return sum(_stat(pokemon, name) for name in STAT_NAMES)
+
+class _SortedColumn:
+    def __init__(self, pairs):
+        pairs = sorted(pairs)
+        self.values = [value for value, _ in pairs]
+        self.ids = [pokemon_id for _, pokemon_id in pairs]
+
+    def between(self, low=None, high=None):
+        start = bisect_left(self.values, low) if low is not None else 0
+        end = bisect_right(self.values, high) if high is not None else len(self.values)
+        return self.ids[start:end]
+
+class PokedexIndex:
+    def __init__(self, pokemon: dict, egg_group_names: dict):
+        self.all_ids = frozenset(pokemon)
+
+        by_type = defaultdict(set)
+        by_ability = defaultdict(set)
+        by_generation = defaultdict(set)
+        by_egg_group = defaultdict(set)
+        babies = set()
+        for p in pokemon.values():
+            for t in p.types:
+                by_type[t.name].add(p.id)
+            for a in p.abilities:
+                by_ability[a.name].add(p.id)
+            if p.species:
+                if p.species.generation_name:
+                    by_generation[p.species.generation_name].add(p.id)
+                if p.species.generation_id is not None:
+                    by_generation[str(p.species.generation_id)].add(p.id)
+                for egg_group_id in p.species.egg_group_ids:
+                    by_egg_group[egg_group_names.get(egg_group_id, str(egg_group_id))].add(p.id)
+                if p.species.is_baby:
+                    babies.add(p.id)
+        self.by_type = {k: frozenset(v) for k, v in by_type.items()}
+        self.by_ability = {k: frozenset(v) for k, v in by_ability.items()}
+        self.by_generation = {k: frozenset(v) for k, v in by_generation.items()}
+        self.by_egg_group = {k: frozenset(v) for k, v in by_egg_group.items()}
+        self.babies = frozenset(babies)
+
+        self.stat_columns = {name: _SortedColumn((_stat(p, name), p.id) for p in pokemon.values()) for name in STAT_NAMES}
+        self.stat_columns["total"] = _SortedColumn((_total(p), p.id) for p in pokemon.values())
+        self.names = _SortedColumn((p.name, p.id) for p in pokemon.values())
+
+        # Sort key of every Pokemon for ordering results
+        self.sort_keys = {
+            "id": {p.id: p.id for p in pokemon.values()},
+            "name": {p.id: p.name for p in pokemon.values()},
+            "order": {p.id: p.order if p.order is not None else 0 for p in pokemon.values()},
+            "total": {p.id: _total(p) for p in pokemon.values()},
+        }
+        for name in STAT_NAMES:
+            self.sort_keys[name] = {p.id: _stat(p, name) for p in pokemon.values()}
+
+    def search(self, types=(), abilities=(), generation=None, egg_group=None, is_baby=None,
+               stat_ranges=None, name_prefix=None, sort="id", descending=False):
+        """
+        Return the ids matching every filter, ordered by sort (ties broken by id).
+        types and abilities must all match. stat_ranges maps a stat name (or "total")
+        to an inclusive (min, max) pair where either bound may be None.
+        """
+        candidates = []
+        for name in types:
+            candidates.append(self.by_type.get(name, frozenset()))
+        for name in abilities:
+            candidates.append(self.by_ability.get(name, frozenset()))
+        if generation is not None:
+            candidates.append(self.by_generation.get(generation, frozenset()))
+        if egg_group is not None:
+            candidates.append(self.by_egg_group.get(egg_group, frozenset()))
+        if is_baby is not None:
+            candidates.append(self.babies if is_baby else self.all_ids - self.babies)
+        for stat, (low, high) in (stat_ranges or {}).items():
+            if low is not None or high is not None:
+                candidates.append(self.stat_columns[stat].between(low, high))
+        if name_prefix:
+            # Every name starting with the prefix sorts before prefix + U+FFFF
+            candidates.append(self.names.between(name_prefix, name_prefix + "\uffff"))
+
+        if candidates:
+            candidates.sort(key=len)
+            result = set(candidates[0])
+            for other in candidates[1:]:
+                if not result:
+                    break
+                result.intersection_update(other)
+        else:
+            result = set(self.all_ids)
+
+        keys = self.sort_keys[sort]
+        ordered = sorted(result, key=lambda pokemon_id: (keys[pokemon_id], pokemon_id))
+        if descending:
+            ordered.reverse()
+        return ordered
@@ -0,0 +1,96 @@
+"""
+Type effectiveness as a NumPy matrix.
+
+The types table does not store damage relations, so the standard chart
+(Gen 6 onwards) is declared here and mapped onto whatever types the catalog
+has; types missing from the chart (unknown, shadow, stellar, ...) are neutral.
+Rows are attacking types, columns defending types.
+"""
+import numpy as np
+
+# Attacking type -> {defending type: multiplier}; unlisted pairs are 1x
+CHART = {
+    "normal": {"rock": 0.5, "ghost": 0, "steel": 0.5},
+    "fire": {"fire": 0.5, "water": 0.5, "grass": 2, "ice": 2, "bug": 2, "rock": 0.5, "dragon": 0.5, "steel": 2},
+    "water": {"fire": 2, "water": 0.5, "grass": 0.5, "ground": 2, "rock": 2, "dragon": 0.5},
+    "electric": {"water": 2, "electric": 0.5, "grass": 0.5, "ground": 0, "flying": 2, "dragon": 0.5},
+    "grass": {"fire": 0.5, "water": 2, "grass": 0.5, "poison": 0.5, "ground": 2, "flying": 0.5, "bug": 0.5,
+              "rock": 2, "dragon": 0.5, "steel": 0.5},
+    "ice": {"fire": 0.5, "water": 0.5, "grass": 2, "ice": 0.5, "ground": 2, "flying": 2, "dragon": 2, "steel": 0.5},
+    "fighting": {"normal": 2, "ice": 2, "poison": 0.5, "flying": 0.5, "psychic": 0.5, "bug": 0.5, "rock": 2,
+                 "ghost": 0, "dark": 2, "steel": 2, "fairy": 0.5},
+    "poison": {"grass": 2, "poison": 0.5, "ground": 0.5, "rock": 0.5, "ghost": 0.5, "steel": 0, "fairy": 2},
+    "ground": {"fire": 2, "electric": 2, "grass": 0.5, "poison": 2, "flying": 0, "bug": 0.5, "rock": 2, "steel": 2},
+    "flying": {"electric": 0.5, "grass": 2, "fighting": 2, "bug": 2, "rock": 0.5, "steel": 0.5},
+    "psychic": {"fighting": 2, "poison": 2, "psychic": 0.5, "dark": 0, "steel": 0.5},
+    "bug": {"fire": 0.5, "grass": 2, "fighting": 0.5, "poison": 0.5, "flying": 0.5, "psychic": 2, "ghost": 0.5,
+            "dark": 2, "steel": 0.5, "fairy": 0.5},
+    "rock": {"fire": 2, "ice": 2, "fighting": 0.5, "ground": 0.5, "flying": 2, "bug": 2, "steel": 0.5},
+    "ghost": {"normal": 0, "psychic": 2, "ghost": 2, "dark": 0.5},
+    "dragon": {"dragon": 2, "steel": 0.5, "fairy": 0},
+    "dark": {"fighting": 0.5, "psychic": 2, "ghost": 2, "dark": 0.5, "fairy": 0.5},
+    "steel": {"fire": 0.5, "water": 0.5, "electric": 0.5, "ice": 2, "rock": 2, "steel": 0.5, "fairy": 2},
+    "fairy": {"fire": 0.5, "fighting": 2, "poison": 0.5, "dragon": 2, "dark": 2, "steel": 0.5},
+}
+
+class TypeChart:
+    def __init__(self, types: dict):
+        """
+        types: {type_id: entry with .name}. Standard types come first so the
+        matrix covers the chart even when the catalog is empty.
+        """
+        names = list(CHART)
+        names.extend(sorted(t.name for t in types.values() if t.name not in CHART))
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(names)}
+        self.index_by_id = {type_id: self.index[t.name] for type_id, t in types.items()}
+
+        # One extra "no type" column of 1s pads single-typed Pokemon
+        self.neutral = len(names)
+        matrix = np.ones((len(names), len(names) + 1), dtype=np.float32)
+        for attacking, row in CHART.items():
+            for defending, multiplier in row.items():
+                matrix[self.index[attacking], self.index[defending]] = multiplier
+        self.matrix = matrix
+        self.standard = np.array([name in CHART for name in names])
+
+    def type_indexes(self, type_names, width: int = 2):
+        """
+        Column indexes for a Pokemon's types, padded with the neutral column.
+        """
+        indexes = [self.index[name] for name in type_names if name in self.index][:width]
+        return indexes + [self.neutral] * (width - len(indexes))
+
+    def defensive(self, team_types):
+        """
+        team_types: list of type-name lists. Returns a (members, attacking types)
+        array of damage multipliers taken.
+        """
+        indexes = np.array([self.type_indexes(types) for types in team_types], dtype=np.intp).reshape(-1, 2)
+        # matrix[:, indexes] -> (attacking, members, 2); multiply both defending types
+        return self.matrix[:, indexes].prod(axis=2).T
+
+    def offensive(self, team_types):
+        """
+        Best multiplier the team deals to each single defending type using its
+        own types as attacking types. Returns (best (defending,), members (members, defending)).
+        """
+        per_member = np.ones((len(team_types), len(self.names)), dtype=np.float32)
+        for i, types in enumerate(team_types):
+            rows = [self.index[name] for name in types if name in self.index]
+            if rows:
+                per_member[i] = self.matrix[rows, :-1].max(axis=0)
+        best = per_member.max(axis=0) if len(team_types) else np.ones(len(self.names), dtype=np.float32)
+        return best, per_member
+
+    def as_dict(self, vector):
+        return {name: float(vector[i]) for i, name in enumerate(self.names) if self.standard[i]}
+
+    def defense_summary(self, vector):
+        multipliers = self.as_dict(vector)
+        return {
+            "multipliers": multipliers,
+            "weaknesses": [name for name, m in multipliers.items() if m > 1],
+            "resistances": [name for name, m in multipliers.items() if 0 < m < 1],
+            "immunities": [name for name, m in multipliers.items() if m == 0],
+        }
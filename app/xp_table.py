@@ -0,0 +1,111 @@
+"""
+Cumulative XP tables for the six growth rates (Gen 3 formulas).
+
+Every rate is evaluated once at import into a row of XP_TABLE, where column n
+is the total XP needed to reach level n. Level lookups are a bisect over the
+row, and the *_batch helpers answer many Pokemon at once with NumPy.
+"""
+from bisect import bisect_right
+import math
+
+import numpy as np
+
+MAX_LEVEL = 100
+DEFAULT_GROWTH_RATE = "medium-fast"
+GROWTH_RATES = ("erratic", "fast", "medium-fast", "medium-slow", "slow", "fluctuating")
+
+# PokeAPI names of the growth_rates table -> formula names
+ALIASES = {
+    "medium": "medium-fast",
+    "slow-then-very-fast": "erratic",
+    "fast-then-very-slow": "fluctuating",
+}
+
+def _total_xp(growth_rate: str, n: int) -> int:
+    if n <= 1:
+        return 0
+
+    if growth_rate == "erratic":
+        if n <= 50:
+            return int((n**3 * (100 - n)) / 50)
+        elif n <= 68:
+            return int((n**3 * (150 - n)) / 100)
+        elif n <= 98:
+            return int((n**3 * math.floor((1911 - 10 * n) / 3)) / 500)
+        else:
+            return int((n**3 * (160 - n)) / 100)
+
+    elif growth_rate == "fast":
+        return int(4 * n**3 / 5)
+
+    elif growth_rate == "medium-slow":
+        return int(6/5 * n**3 - 15 * n**2 + 100 * n - 140)
+
+    elif growth_rate == "slow":
+        return int(5 * n**3 / 4)
+
+    elif growth_rate == "fluctuating":
+        if n <= 15:
+            return int(n**3 * (math.floor((n + 1) / 3) + 24) / 50)
+        elif n <= 36:
+            return int(n**3 * (n + 14) / 50)
+        else:
+            return int(n**3 * (math.floor(n / 2) + 32) / 50)
+
+    # medium-fast
+    return int(n**3)
+
+# (rates, levels 0..MAX_LEVEL)
+XP_TABLE = np.array([[_total_xp(rate, n) for n in range(MAX_LEVEL + 1)] for rate in GROWTH_RATES], dtype=np.int64)
+XP_TABLE.setflags(write=False)
+
+# Plain lists of levels 1..MAX_LEVEL for scalar bisects
+_ROWS = tuple(row[1:].tolist() for row in XP_TABLE)
+
+# Rows shifted apart so one searchsorted over the flattened table serves every rate
+_ROW_SPAN = int(XP_TABLE.max()) + 1
+_OFFSETS = np.arange(len(GROWTH_RATES), dtype=np.int64) * _ROW_SPAN
+_FLAT = (XP_TABLE[:, 1:] + _OFFSETS[:, None]).ravel()
+
+_INDEX = {rate: i for i, rate in enumerate(GROWTH_RATES)}
+_INDEX.update({alias: _INDEX[rate] for alias, rate in ALIASES.items()})
+
+def rate_index(growth_rate: str) -> int:
+    """
+    Row of XP_TABLE for a growth rate name; unknown names use medium-fast.
+    """
+    return _INDEX.get(growth_rate, _INDEX[DEFAULT_GROWTH_RATE])
+
+def xp_for_level(growth_rate: str, level: int) -> int:
+    """
+    Total XP required to reach level (capped at MAX_LEVEL).
+    """
+    return int(XP_TABLE[rate_index(growth_rate), min(max(level, 0), MAX_LEVEL)])
+
+def next_level_xp(growth_rate: str, level: int) -> int:
+    return xp_for_level(growth_rate, level + 1)
+
+def level_for_xp(growth_rate: str, xp: int) -> int:
+    """
+    Highest level whose XP requirement is met by xp.
+    """
+    return bisect_right(_ROWS[rate_index(growth_rate)], xp)
+
+def rate_indexes(growth_rates) -> np.ndarray:
+    return np.fromiter((rate_index(rate) for rate in growth_rates), dtype=np.intp)
+
+def levels_for_xp_batch(growth_rates, xp) -> np.ndarray:
+    """
+    level_for_xp for many Pokemon: growth_rates is a sequence of names, xp an array.
+    """
+    rows = rate_indexes(growth_rates)
+    xp = np.clip(np.asarray(xp, dtype=np.int64), -1, _ROW_SPAN - 1)
+    positions = np.searchsorted(_FLAT, xp + _OFFSETS[rows], side="right")
+    return positions - rows * MAX_LEVEL
+
+def next_level_xp_batch(growth_rates, levels) -> np.ndarray:
+    """
+    next_level_xp for many Pokemon.
+    """
+    levels = np.clip(np.asarray(levels, dtype=np.intp) + 1, 0, MAX_LEVEL)
+    return XP_TABLE[rate_indexes(growth_rates), levels]
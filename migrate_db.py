@@ -0,0 +1,42 @@
+import sys
+import os
+from sqlalchemy import text
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import engine, SessionLocal, create_schema
+from app import models, crud
+from resync_sequences import resync_sequences
+
+# Changes on top of create_schema() (tables, columns and indexes).
+# Every statement is idempotent: the Procfile runs this script once per
+# deploy as its release command.
+MIGRATIONS = [
+    # GET /pokemon is served from the catalog; these keyset indexes back no query
+    "DROP INDEX IF EXISTS ix_pokemon_order_id",
+    "DROP INDEX IF EXISTS ix_pokemon_name_id",
+    "DROP INDEX IF EXISTS ix_pokemon_base_experience_id",
+]
+
+def migrate_db():
+    create_schema()
+
+    with engine.begin() as conn:
+        for statement in MIGRATIONS:
+            print(statement)
+            conn.execute(text(statement))
+
+    resync_sequences()
+
+    db = SessionLocal()
+    try:
+        crud.sync_pokemon_growth_rates(db)
+        count = crud.refresh_next_level_xp(db)
+        print(f"Backfilled next_level_xp for {count} Pokemon.")
+    finally:
+        db.close()
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    migrate_db()
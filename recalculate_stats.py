@@ -0,0 +1,19 @@
+import sys
+import os
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import crud
+
+def recalculate_stats(user_id=None):
+    db = SessionLocal()
+    try:
+        count = crud.recalculate_user_pokemon_stats(db, user_id)
+        print(f"Recalculated stats for {count} Pokemon.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    recalculate_stats(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,34 @@
+import sys
+import os
+from sqlalchemy import text
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import engine, Base
+from app import models
+
+def resync_sequences():
+    """
+    Move every serial id sequence past the largest id in its table, so inserts
+    that rely on the sequence never collide with rows written with explicit ids.
+    Safe to run while the app is serving: sequences never move backwards.
+    """
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if "id" not in table.c or not table.c.id.primary_key:
+                continue
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table.name}).scalar()
+            if not sequence:
+                continue
+            # Only ever advance: another instance may hold an id from nextval()
+            # that it has not committed yet, so the next id is past both
+            # MAX(id) and the last value the sequence handed out.
+            next_id = conn.execute(text(
+                f"SELECT setval(:sequence, GREATEST(COALESCE((SELECT MAX(id) FROM {table.name}), 0), "
+                f"(SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM {sequence})) + 1, false)"
+            ), {"sequence": sequence}).scalar()
+            print(f"{table.name}: next id {next_id}")
+
+if __name__ == "__main__":
+    resync_sequences()
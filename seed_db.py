@@ -7,10 +7,10 @@ sys.path.append(os.getcwd())
 # os.environ["DB_HOST"] = "localhost"  # Removed to allow Railway environment variables
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete
 from sqlalchemy.exc import IntegrityError
 from app.database import SessionLocal, engine, Base
-from app import models
+from app import models, catalog, crud
 
 # To ensure Railway has the latest schema, we drop then create. 
 # WARNING: This deletes existing data in these tables.
@@ -262,6 +262,8 @@ async def seed_species_basic(db, client, semaphore):
                     capture_rate=s_data["capture_rate"],
                     base_happiness=s_data["base_happiness"],
                     is_baby=s_data["is_baby"],
+                    is_legendary=s_data["is_legendary"],
+                    is_mythical=s_data["is_mythical"],
                     hatch_counter=s_data["hatch_counter"],
                     has_gender_differences=s_data["has_gender_differences"],
                     growth_rate_id=growth_rate_id,
@@ -320,6 +322,10 @@ async def seed_evolution_details(db, client, semaphore):
     data = await fetch_url(client, f"{POKEAPI_BASE_URL}/evolution-chain?limit=1000", semaphore)
     if not data: return
     
+    # Edges are rebuilt from scratch on every run
+    db.execute(delete(models.EvolutionEdge))
+    db.commit()
+    
     urls = [r["url"] for r in data["results"]]
     for i in range(0, len(urls), CHUNK_SIZE):
         chunk = urls[i:i+CHUNK_SIZE]
@@ -350,6 +356,18 @@ async def seed_evolution_details(db, client, semaphore):
                         evolution_species_id=next_species_id
                     ))
                     
+                    # The columns above only hold one branch; record every branch and trigger as an edge
+                    for detail in evolution["evolution_details"] or [None]:
+                        db.add(models.EvolutionEdge(
+                            chain_id=chain_data["id"],
+                            from_species_id=species_id,
+                            to_species_id=next_species_id,
+                            trigger=detail["trigger"]["name"] if detail else None,
+                            min_level=detail["min_level"] if detail else None,
+                            item_name=detail["item"]["name"] if detail and detail["item"] else None,
+                            details=detail
+                        ))
+                    
                     process_chain(evolution)
             
             process_chain(chain_data["chain"])
@@ -449,6 +467,9 @@ async def main():
         await seed_evolution_details(db, client, semaphore)
         await seed_pokemon_and_links(db, client, semaphore)
 
+    crud.sync_pokemon_growth_rates(db)
+    # Tell running API servers to reload their in-memory catalog
+    catalog.bump_version(db)
     print("--- Full Seeding Completed ---")
     db.close()
 
@@ -5,9 +5,9 @@ import sys
 
 sys.path.append(os.getcwd())
 
-from sqlalchemy import update
+from sqlalchemy import update, delete
 from app.database import SessionLocal
-from app import models
+from app import models, catalog
 
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
 MAX_CONCURRENCY = 20
@@ -29,6 +29,10 @@ async def seed_evolution_details(db, client, semaphore):
     data = await fetch_url(client, f"{POKEAPI_BASE_URL}/evolution-chain?limit=1000", semaphore)
     if not data: return
     
+    # Edges are rebuilt from scratch on every run
+    db.execute(delete(models.EvolutionEdge))
+    db.commit()
+    
     urls = [r["url"] for r in data["results"]]
     for i in range(0, len(urls), CHUNK_SIZE):
         chunk = urls[i:i+CHUNK_SIZE]
@@ -59,6 +63,18 @@ async def seed_evolution_details(db, client, semaphore):
                         evolution_species_id=next_species_id
                     ))
                     
+                    # The columns above only hold one branch; record every branch and trigger as an edge
+                    for detail in evolution["evolution_details"] or [None]:
+                        db.add(models.EvolutionEdge(
+                            chain_id=chain_data["id"],
+                            from_species_id=species_id,
+                            to_species_id=next_species_id,
+                            trigger=detail["trigger"]["name"] if detail else None,
+                            min_level=detail["min_level"] if detail else None,
+                            item_name=detail["item"]["name"] if detail and detail["item"] else None,
+                            details=detail
+                        ))
+                    
                     process_chain(evolution)
             
             process_chain(chain_data["chain"])
@@ -71,6 +87,8 @@ async def main():
     async with httpx.AsyncClient(timeout=60.0) as client:
         await seed_evolution_details(db, client, semaphore)
 
+    # Tell running API servers to reload their in-memory catalog
+    catalog.bump_version(db)
     print("--- Evolution Seeding Completed ---")
     db.close()
 
@@ -0,0 +1,19 @@
+"""
+Most tests cover the in-memory modules and need no database. The database
+tests need a disposable Postgres database: set TEST_DATABASE_URL and its
+tables are dropped and recreated. Without it those tests are skipped.
+"""
+import os
+import sys
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # app.database builds its engines from DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.setdefault("RAILWAY_ENVIRONMENT", "test")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+requires_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
@@ -0,0 +1,42 @@
+from app.autocomplete import NameEntry, NameTrie, normalize
+
+TRIE = NameTrie([
+    NameEntry("pokemon", 1, "bulbasaur"),
+    NameEntry("pokemon", 4, "charmander"),
+    NameEntry("pokemon", 5, "charmeleon"),
+    NameEntry("pokemon", 6, "charizard"),
+    NameEntry("species", 4, "charmander"),
+    NameEntry("move", 52, "ember"),
+    NameEntry("item", 17, "potion"),
+])
+
+def _names(matches):
+    return [(entry.kind, entry.name, distance) for entry, distance in matches]
+
+def test_prefix_matches_rank_shorter_names_first():
+    assert _names(TRIE.complete("char")) == [
+        ("pokemon", "charizard", 0),
+        ("pokemon", "charmander", 0),
+        ("species", "charmander", 0),
+        ("pokemon", "charmeleon", 0),
+    ]
+
+def test_typos_within_the_default_distance_match():
+    assert _names(TRIE.complete("bulbsaur")) == [("pokemon", "bulbasaur", 1)]
+    assert [distance for _, distance in TRIE.complete("chx")] == [1, 1, 1, 1]
+
+def test_short_queries_and_max_distance_zero_need_an_exact_prefix():
+    assert TRIE.complete("cx") == []
+    assert TRIE.complete("chx", max_distance=0) == []
+
+def test_the_first_letter_is_trusted():
+    assert TRIE.complete("xharmander") == []
+
+def test_kinds_and_limit():
+    assert _names(TRIE.complete("charmander", kinds={"species"})) == [("species", "charmander", 0)]
+    assert len(TRIE.complete("ch", limit=2)) == 2
+
+def test_queries_are_normalized():
+    assert normalize("  Mr Mime ") == "mr-mime"
+    assert _names(TRIE.complete("  EMB")) == [("move", "ember", 0)]
+    assert TRIE.complete("   ") == []
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.encounters import AliasTable, EncounterPools, LEGENDARY_WEIGHT, encounter_weight
+
+def _species(species_id, generation, capture_rate=45, is_baby=False, is_legendary=False):
+    return SimpleNamespace(
+        id=species_id, generation_id=generation, generation_name=f"generation-{'i' * generation}",
+        capture_rate=capture_rate, is_baby=is_baby, is_legendary=is_legendary, is_mythical=False,
+    )
+
+def _pokemon(pokemon_id, species, is_default=True):
+    return SimpleNamespace(id=pokemon_id, species=species, is_default=is_default)
+
+def test_alias_table_sampling_follows_the_weights():
+    weights = np.array([1, 3, 0, 6], dtype=float)
+    table = AliasTable(weights)
+
+    samples = table.sample(np.random.default_rng(0), 200_000)
+    frequencies = np.bincount(samples, minlength=len(weights)) / len(samples)
+
+    assert frequencies[2] == 0
+    np.testing.assert_allclose(frequencies, weights / weights.sum(), atol=0.01)
+
+def test_encounter_weight():
+    assert encounter_weight(_species(1, 1, capture_rate=45), legendary_flags=True) == 45
+    assert encounter_weight(_species(172, 2, capture_rate=190, is_baby=True), legendary_flags=True) == 190 * 0.25
+    assert encounter_weight(_species(150, 1, capture_rate=3, is_legendary=True), legendary_flags=True) == 3 * LEGENDARY_WEIGHT
+    # Without legendary flags in the catalog, the hardest catches count as legendary
+    assert encounter_weight(_species(150, 1, capture_rate=3), legendary_flags=False) == 3 * LEGENDARY_WEIGHT
+
+def test_pools_hold_one_default_form_per_species():
+    bulbasaur, pichu = _species(1, 1), _species(172, 2)
+    pools = EncounterPools({
+        1: _pokemon(1, bulbasaur),
+        10001: _pokemon(10001, bulbasaur, is_default=False),
+        172: _pokemon(172, pichu),
+    })
+
+    assert [p.id for p in pools.pools["all"][0]] == [1, 172]
+    assert [p.id for p in pools.pools["2"][0]] == [172]
+    assert [p.id for p in pools.pools["generation-ii"][0]] == [172]
+
+def test_draw():
+    pools = EncounterPools({1: _pokemon(1, _species(1, 1)), 172: _pokemon(172, _species(172, 2))})
+
+    assert {p.id for p in pools.draw("1", 50)} == {1}
+    assert len(pools.draw("all", 7)) == 7
+    assert pools.draw("generation-ix") is None
+
+def test_default_pool_falls_back_to_all_without_generation_one():
+    pools = EncounterPools({172: _pokemon(172, _species(172, 2))})
+
+    assert [p.id for p in pools.draw()] == [172]
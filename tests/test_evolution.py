@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from app.evolution import EvolutionEdgeEntry, EvolutionGraph, has_extra_conditions
+
+def _species(*entries):
+    return {
+        species_id: SimpleNamespace(
+            id=species_id, name=name, evolves_from_species_id=parent,
+            evolution_level=evolution_level, evolution_species_id=evolution_species_id,
+        )
+        for species_id, name, parent, evolution_level, evolution_species_id in entries
+    }
+
+def _level_up(from_id, to_id, min_level, conditional=False):
+    return EvolutionEdgeEntry(from_id, to_id, "level-up", min_level, None, conditional)
+
+CHARMANDER_LINE = _species(
+    (4, "charmander", None, 16, 5),
+    (5, "charmeleon", 4, 36, 6),
+    (6, "charizard", 5, None, None),
+)
+
+def test_level_up_path_crosses_several_evolutions():
+    graph = EvolutionGraph(CHARMANDER_LINE, [_level_up(4, 5, 16), _level_up(5, 6, 36)])
+
+    assert graph.level_up_path(4, 5, 40) == [(16, 4, 5), (36, 5, 6)]
+    assert graph.level_up_path(4, 5, 20) == [(16, 4, 5)]
+    assert graph.level_up_path(4, 5, 15) == []
+
+def test_level_up_path_evolves_at_the_first_level_gained_when_already_past_min_level():
+    graph = EvolutionGraph(CHARMANDER_LINE, [_level_up(4, 5, 16), _level_up(5, 6, 36)])
+
+    assert graph.level_up_path(4, 20, 40) == [(21, 4, 5), (36, 5, 6)]
+
+def test_level_up_path_falls_back_to_species_columns_without_edges():
+    graph = EvolutionGraph(CHARMANDER_LINE, [])
+
+    assert graph.level_up_path(4, 1, 100) == [(16, 4, 5), (36, 5, 6)]
+
+def test_level_up_path_takes_the_lowest_level_branch():
+    species = _species((1, "base", None, None, None), (2, "late", 1, None, None), (3, "early", 1, None, None))
+    graph = EvolutionGraph(species, [_level_up(1, 2, 20), _level_up(1, 3, 10)])
+
+    assert graph.level_up_path(1, 1, 30) == [(10, 1, 3)]
+
+def test_level_up_path_stops_when_branches_tie():
+    species = _species((265, "wurmple", None, None, None), (266, "silcoon", 265, None, None), (268, "cascoon", 265, None, None))
+    graph = EvolutionGraph(species, [_level_up(265, 266, 7), _level_up(265, 268, 7)])
+
+    assert graph.level_up_path(265, 1, 10) == []
+
+def test_level_up_path_skips_item_and_conditional_edges():
+    species = _species((133, "eevee", None, None, None), (136, "flareon", 133, None, None), (196, "espeon", 133, None, None))
+    edges = [
+        EvolutionEdgeEntry(133, 136, "use-item", None, "fire-stone"),
+        _level_up(133, 196, 1, conditional=True),
+    ]
+    graph = EvolutionGraph(species, edges)
+
+    assert graph.level_up_path(133, 1, 100) == []
+
+def test_has_extra_conditions():
+    assert not has_extra_conditions(None)
+    assert not has_extra_conditions({"trigger": {"name": "level-up"}, "min_level": 16, "item": None})
+    assert not has_extra_conditions({"min_level": 16, "gender": None, "time_of_day": "", "needs_overworld_rain": False})
+    assert has_extra_conditions({"min_level": 20, "time_of_day": "night"})
+    # 0 means attack == defense for Tyrogue, not "unset"
+    assert has_extra_conditions({"min_level": 20, "relative_physical_stats": 0})
+
+def test_chain_lists_the_whole_family():
+    graph = EvolutionGraph(CHARMANDER_LINE, [_level_up(4, 5, 16), _level_up(5, 6, 36)])
+
+    chain = graph.chain(5)
+    assert chain["root_species_id"] == 4
+    assert chain["ancestors"] == [4]
+    assert chain["descendants"] == [6]
+    assert chain["chain"]["evolves_to"][0]["evolves_to"][0]["name"] == "charizard"
+    assert graph.chain(999) is None
@@ -0,0 +1,36 @@
+import base64
+import json
+
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", True, "pikachu", 25)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "name", True) == ("pikachu", 25)
+    assert decode_cursor(encode_cursor("base_experience", False, None, 172), "base_experience", False) == (None, 172)
+
+def test_cursor_for_another_ordering_is_rejected():
+    cursor = encode_cursor("order", False, 10, 10)
+
+    with pytest.raises(ValueError, match="ordering"):
+        decode_cursor(cursor, "name", False)
+    with pytest.raises(ValueError, match="ordering"):
+        decode_cursor(cursor, "order", True)
+
+@pytest.mark.parametrize("cursor", [
+    "zzz",
+    "",
+    _raw_cursor(["order", False, 10]),
+    _raw_cursor(["order", False, 10, "10"]),
+    _raw_cursor(["order", False, [10], 10]),
+    _raw_cursor({"sort": "order"}),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Malformed"):
+        decode_cursor(cursor, "order", False)
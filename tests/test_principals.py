@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from app.principals import Principal, PrincipalCache
+
+def _principal(user_id=1, username="ash", money=3000):
+    return Principal(
+        id=user_id, username=username, email=f"{username}@example.com", is_active=True, money=money,
+        elite_four_progress=0, is_champion=False, created_at=datetime(2024, 1, 1),
+    )
+
+def test_get_returns_what_was_put():
+    cache = PrincipalCache(size=10, ttl=60)
+    cache.put(_principal(), cache.generation)
+
+    assert cache.get("ash") == _principal()
+    assert cache.get("misty") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_invalidate_marks_the_entry_stale():
+    cache = PrincipalCache(size=10, ttl=60)
+    cache.put(_principal(), cache.generation)
+
+    cache.invalidate(1)
+
+    assert cache.get("ash") is None
+    # Handlers that only need the id keep using the entry
+    assert cache.get("ash", fresh=False) == _principal()
+
+def test_a_read_that_raced_an_invalidation_is_stored_stale():
+    cache = PrincipalCache(size=10, ttl=60)
+    generation = cache.generation
+    # The row was read, then a write committed before the read is cached
+    cache.invalidate(1)
+    cache.put(_principal(money=3000), generation)
+
+    assert cache.get("ash") is None
+
+    cache.put(_principal(money=2500), cache.generation)
+    assert cache.get("ash").money == 2500
+
+def test_entries_expire():
+    cache = PrincipalCache(size=10, ttl=0)
+    cache.put(_principal(), cache.generation)
+
+    assert cache.get("ash", fresh=False) is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(size=2, ttl=60)
+    cache.put(_principal(1, "ash"), cache.generation)
+    cache.put(_principal(2, "misty"), cache.generation)
+    cache.get("ash")
+    cache.put(_principal(3, "brock"), cache.generation)
+
+    assert cache.get("misty") is None
+    assert cache.get("ash") is not None
+    assert cache.get("brock") is not None
+    # Invalidating an evicted user is harmless
+    cache.invalidate(2)
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,82 @@
+"""
+Endpoints that return Pokemon nested in user rows must issue a fixed number
+of queries however many rows they return (no lazy load per row).
+"""
+import pytest
+from sqlalchemy import event
+
+from conftest import requires_database
+
+pytestmark = requires_database
+
+POKEMON_IDS = (1, 2, 3, 4, 5, 6)
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+    from app.database import Base, engine, SessionLocal
+    from app import models, auth
+
+    Base.metadata.drop_all(bind=engine)
+    from app.main import app
+
+    db = SessionLocal()
+    growth_rate = models.GrowthRate(id=1, name="medium-fast")
+    species = models.PokemonSpecies(id=1, name="bulbasaur", growth_rate=growth_rate)
+    fire, grass = models.Type(id=1, name="fire"), models.Type(id=2, name="grass")
+    blaze = models.Ability(id=1, name="blaze")
+    for pokemon_id in POKEMON_IDS:
+        db.add(models.Pokemon(
+            id=pokemon_id, name=f"pokemon-{pokemon_id}", species=species, height=7, weight=69, order=pokemon_id, is_default=True,
+            stats={"hp": 45, "attack": 49, "defense": 49, "special-attack": 65, "special-defense": 65, "speed": 45},
+            types=[fire, grass], abilities=[blaze],
+        ))
+    for username in ("one", "many"):
+        db.add(models.User(username=username, email=f"{username}@example.com", hashed_password="x"))
+    db.commit()
+
+    for username, count in (("one", 1), ("many", len(POKEMON_IDS))):
+        user = db.query(models.User).filter(models.User.username == username).one()
+        for pokemon_id in POKEMON_IDS[:count]:
+            db.add(models.UserPokemon(user_id=user.id, pokemon_id=pokemon_id, is_in_party=True))
+            db.add(models.UserFavorite(user_id=user.id, pokemon_id=pokemon_id))
+    db.commit()
+    db.close()
+
+    with TestClient(app) as test_client:
+        test_client.tokens = {
+            username: {"Authorization": "Bearer " + auth.create_access_token({"sub": username})}
+            for username in ("one", "many")
+        }
+        yield test_client
+
+    Base.metadata.drop_all(bind=engine)
+
+def _query_count(client, path, username):
+    from app.database import async_engine
+
+    # Warm the principal cache so only the endpoint's own queries are counted
+    assert client.get(path, headers=client.tokens[username]).status_code == 200
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(path, headers=client.tokens[username])
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    return len(statements), response.json()
+
+# user rows + pokemon (species and growth rate joined) + types + abilities
+@pytest.mark.parametrize("path", ["/game/my-pokemon", "/game/party", "/users/favorites"])
+def test_nested_pokemon_query_count_is_fixed(client, path):
+    one, one_body = _query_count(client, path, "one")
+    many, many_body = _query_count(client, path, "many")
+    assert (len(one_body), len(many_body)) == (1, len(POKEMON_IDS))
+    assert one == many == 4
+    assert all(row["pokemon"]["types"] and row["pokemon"]["species"]["growth_rate"] for row in many_body)
+
+def test_projection_skips_unrequested_relationships(client):
+    count, body = _query_count(client, "/game/my-pokemon?fields=name", "many")
+    assert count == 2
+    assert set(body[0]["pokemon"]) == {"id", "name"}
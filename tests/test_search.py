@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from app.search import PokedexIndex
+
+def _pokemon(pokemon_id, name, types, abilities, generation, stats, is_baby=False, egg_groups=(1,)):
+    return SimpleNamespace(
+        id=pokemon_id, name=name, order=pokemon_id,
+        types=[SimpleNamespace(name=t) for t in types],
+        abilities=[SimpleNamespace(name=a) for a in abilities],
+        species=SimpleNamespace(
+            generation_id=generation, generation_name=f"generation-{'i' * generation}",
+            egg_group_ids=list(egg_groups), is_baby=is_baby,
+        ),
+        stats=dict(zip(("hp", "attack", "defense", "special-attack", "special-defense", "speed"), stats)),
+    )
+
+POKEMON = {
+    p.id: p for p in [
+        _pokemon(1, "bulbasaur", ["grass", "poison"], ["overgrow"], 1, (45, 49, 49, 65, 65, 45)),
+        _pokemon(6, "charizard", ["fire", "flying"], ["blaze"], 1, (78, 84, 78, 109, 85, 100)),
+        _pokemon(4, "charmander", ["fire"], ["blaze"], 1, (39, 52, 43, 60, 50, 65)),
+        _pokemon(172, "pichu", ["electric"], ["static"], 2, (20, 40, 15, 35, 35, 60), is_baby=True, egg_groups=()),
+        _pokemon(25, "pikachu", ["electric"], ["static"], 1, (35, 55, 40, 50, 50, 90), egg_groups=(5, 6)),
+    ]
+}
+INDEX = PokedexIndex(POKEMON, {1: "monster", 5: "ground", 6: "fairy"})
+
+def test_no_filters_returns_everything_by_id():
+    assert INDEX.search() == [1, 4, 6, 25, 172]
+
+def test_types_and_abilities_must_all_match():
+    assert INDEX.search(types=["fire"]) == [4, 6]
+    assert INDEX.search(types=["fire", "flying"]) == [6]
+    assert INDEX.search(types=["fire"], abilities=["static"]) == []
+    assert INDEX.search(types=["shadow"]) == []
+
+def test_generation_by_name_or_id():
+    assert INDEX.search(generation="2") == [172]
+    assert INDEX.search(generation="generation-ii") == [172]
+
+def test_egg_group_and_baby():
+    assert INDEX.search(egg_group="fairy") == [25]
+    assert INDEX.search(is_baby=True) == [172]
+    assert INDEX.search(types=["electric"], is_baby=False) == [25]
+
+def test_stat_ranges_are_inclusive():
+    assert INDEX.search(stat_ranges={"speed": (65, 90)}) == [4, 25]
+    assert INDEX.search(stat_ranges={"hp": (None, 39), "total": (None, None)}) == [4, 25, 172]
+    assert INDEX.search(stat_ranges={"total": (500, None)}) == [6]
+
+def test_name_prefix():
+    assert INDEX.search(name_prefix="char") == [4, 6]
+    assert INDEX.search(name_prefix="pi", types=["electric"]) == [25, 172]
+
+def test_sort_breaks_ties_by_id():
+    assert INDEX.search(types=["electric"], sort="name") == [172, 25]
+    assert INDEX.search(sort="total", descending=True) == [6, 25, 1, 4, 172]
+    # charmander and pikachu both have 50 special defense
+    assert INDEX.search(sort="special-defense") == [172, 4, 25, 1, 6]
+    assert INDEX.search(types=["fire"], sort="order", descending=True) == [6, 4]
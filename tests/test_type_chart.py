@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from app.type_chart import CHART, TypeChart
+
+CHART_TYPES = TypeChart({
+    i: SimpleNamespace(name=name) for i, name in enumerate(list(CHART) + ["shadow"], start=1)
+})
+
+def test_dual_types_multiply():
+    multipliers = CHART_TYPES.as_dict(CHART_TYPES.defensive([["grass", "poison"]])[0])
+
+    assert multipliers["fire"] == 2
+    assert multipliers["psychic"] == 2
+    assert multipliers["ground"] == 1
+    assert multipliers["grass"] == 0.25
+    assert multipliers["water"] == 0.5
+
+def test_single_types_are_padded_with_the_neutral_column():
+    defense = CHART_TYPES.defensive([["normal"], ["fire", "flying"]])
+
+    assert defense.shape == (2, len(CHART_TYPES.names))
+    assert CHART_TYPES.as_dict(defense[0])["fighting"] == 2
+    assert CHART_TYPES.as_dict(defense[1])["rock"] == 4
+
+def test_types_outside_the_chart_are_neutral_and_not_reported():
+    vector = CHART_TYPES.defensive([["shadow"]])[0]
+
+    assert set(vector.tolist()) == {1}
+    assert "shadow" not in CHART_TYPES.as_dict(vector)
+
+def test_defense_summary():
+    summary = CHART_TYPES.defense_summary(CHART_TYPES.defensive([["ghost"]])[0])
+
+    assert summary["immunities"] == ["normal", "fighting"]
+    assert summary["weaknesses"] == ["ghost", "dark"]
+    assert set(summary["resistances"]) == {"poison", "bug"}
+
+def test_offensive_coverage_takes_the_best_member():
+    best, per_member = CHART_TYPES.offensive([["fire"], ["water"]])
+    coverage = CHART_TYPES.as_dict(best)
+
+    assert per_member.shape == (2, len(CHART_TYPES.names))
+    assert coverage["grass"] == 2
+    assert coverage["fire"] == 2
+    assert coverage["dragon"] == 0.5
+
+def test_empty_team():
+    best, per_member = CHART_TYPES.offensive([])
+
+    assert set(best.tolist()) == {1}
+    assert per_member.shape == (0, len(CHART_TYPES.names))